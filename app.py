@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g, send_file
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
@@ -6,14 +6,1184 @@ from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics.pairwise import cosine_similarity
 import random
 import os
-import pickle
+import io
+import csv
+import json
+import hashlib
+import joblib
+import threading
+import time
+import zlib
+import sys
+import sqlite3
+import itertools
+import copy
+import queue
+import atexit
+import bisect
+import contextlib
+import cProfile
+import pstats
+import hmac
+import re
+import shutil
+import tempfile
+import unicodedata
+from collections import OrderedDict, deque
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows: süreçler arası dosya kilidi yok
+    fcntl = None
+
+try:
+    import resource
+except ImportError:  # Windows: tepe bellek raporlanmaz
+    resource = None
+
 app = Flask(__name__)
 
+class SonucOnbellegi:
+    """Boyut ve süre sınırlı (LRU + TTL) öneri sonucu önbelleği; ttl_saniye=None ise süre sınırı yok"""
+    def __init__(self, maks_boyut=1024, ttl_saniye=300):
+        self.maks_boyut = maks_boyut
+        self.ttl_saniye = ttl_saniye
+        self._kayitlar = OrderedDict()
+        self._kilit = threading.Lock()
+        self.isabet = 0
+        self.iska = 0
+    
+    def al(self, anahtar):
+        """Anahtar için geçerli sonucu döndür, yoksa None"""
+        with self._kilit:
+            kayit = self._kayitlar.get(anahtar)
+            if kayit is not None and (self.ttl_saniye is None or time.monotonic() - kayit[0] <= self.ttl_saniye):
+                self._kayitlar.move_to_end(anahtar)
+                self.isabet += 1
+                return kayit[1]
+            if kayit is not None:
+                del self._kayitlar[anahtar]
+            self.iska += 1
+            return None
+    
+    def koy(self, anahtar, deger):
+        """Sonucu kaydet, boyut aşılırsa en eski kullanılanı çıkar"""
+        if self.maks_boyut <= 0:
+            return
+        with self._kilit:
+            self._kayitlar[anahtar] = (time.monotonic(), deger)
+            self._kayitlar.move_to_end(anahtar)
+            while len(self._kayitlar) > self.maks_boyut:
+                self._kayitlar.popitem(last=False)
+    
+    def temizle(self):
+        with self._kilit:
+            self._kayitlar.clear()
+    
+    def istatistikler(self):
+        with self._kilit:
+            toplam = self.isabet + self.iska
+            return {
+                'boyut': len(self._kayitlar),
+                'maks_boyut': self.maks_boyut,
+                'ttl_saniye': self.ttl_saniye,
+                'isabet': self.isabet,
+                'iska': self.iska,
+                'isabet_orani': round(self.isabet / toplam, 4) if toplam else 0
+            }
+
+class _AsamaZamanlayici:
+    """Bir işlem aşamasının süresini ölçüp histograma ekleyen bağlam yöneticisi"""
+    __slots__ = ('metrikler', 'asama', 'baslangic')
+
+    def __init__(self, metrikler, asama):
+        self.metrikler = metrikler
+        self.asama = asama
+
+    def __enter__(self):
+        self.baslangic = time.perf_counter()
+        return self
+
+    def __exit__(self, *hata):
+        self.metrikler.gozlemle(
+            'kahve_asama_suresi_saniye', time.perf_counter() - self.baslangic, asama=self.asama
+        )
+        return False
+
+class Metrikler:
+    """Süre histogramları, sayaçlar ve anlık ölçümler; Prometheus metin biçiminde dışa aktarılır
+    
+    Kapalıyken ölçüm çağrıları hiçbir şey yapmaz (aşama zamanlayıcısı ortak bir boş bağlamdır).
+    """
+    # Saniye cinsinden histogram üst sınırları
+    SURE_SINIRLARI = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    ACIKLAMALAR = {
+        'kahve_istek_suresi_saniye': ('histogram', 'Endpoint başına istek süresi'),
+        'kahve_asama_suresi_saniye': ('histogram', 'Öneri hattındaki aşamaların süresi'),
+        'kahve_istek_toplam': ('counter', 'Endpoint ve durum koduna göre istek sayısı'),
+        'kahve_geleneksel_yedek_toplam': ('counter', 'Geleneksel öneri yöntemine düşülen sorgu sayısı'),
+        'kahve_tahmin_hatasi_toplam': ('counter', 'Model tahmini başarısız olup rastgele puana düşülen sorgu sayısı'),
+        'kahve_onbellek_isabet_toplam': ('counter', 'Önbellek isabetleri'),
+        'kahve_onbellek_iska_toplam': ('counter', 'Önbellek ıskaları'),
+        'kahve_onbellek_boyutu': ('gauge', 'Önbellekteki kayıt sayısı'),
+    }
+    _BOS_ZAMANLAYICI = contextlib.nullcontext()
+
+    def __init__(self, etkin=False):
+        self.etkin = etkin
+        self._kilit = threading.Lock()
+        # (ad, etiketler) -> [kova sayıları..., toplam süre, gözlem sayısı]
+        self._histogramlar = {}
+        self._sayaclar = {}
+        # Dışa aktarma anında çağrılıp [(ad, etiketler, değer)] döndüren fonksiyonlar
+        self._olcerler = []
+
+    def asama(self, asama):
+        """with metrikler.asama('puanlama'): ... bloğunun süresini ölç"""
+        if not self.etkin:
+            return self._BOS_ZAMANLAYICI
+        return _AsamaZamanlayici(self, asama)
+
+    def gozlemle(self, ad, sure, **etiketler):
+        if not self.etkin:
+            return
+        anahtar = (ad, tuple(sorted(etiketler.items())))
+        kova = bisect.bisect_left(self.SURE_SINIRLARI, sure)
+        with self._kilit:
+            histogram = self._histogramlar.get(anahtar)
+            if histogram is None:
+                histogram = self._histogramlar[anahtar] = [0] * (len(self.SURE_SINIRLARI) + 1) + [0.0, 0]
+            histogram[kova] += 1
+            histogram[-2] += sure
+            histogram[-1] += 1
+
+    def say(self, ad, miktar=1, **etiketler):
+        if not self.etkin:
+            return
+        anahtar = (ad, tuple(sorted(etiketler.items())))
+        with self._kilit:
+            self._sayaclar[anahtar] = self._sayaclar.get(anahtar, 0) + miktar
+
+    def olcer_ekle(self, fonksiyon):
+        self._olcerler.append(fonksiyon)
+
+    @staticmethod
+    def _etiket_metni(etiketler):
+        if not etiketler:
+            return ''
+        kacisli = lambda d: str(d).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{ad}="{kacisli(deger)}"' for ad, deger in etiketler) + '}'
+
+    def metin(self):
+        """Tüm metrikleri Prometheus metin biçiminde (0.0.4) döndür"""
+        with self._kilit:
+            histogramlar = {anahtar: list(deger) for anahtar, deger in self._histogramlar.items()}
+            degerler = dict(self._sayaclar)
+        for olcer in self._olcerler:
+            for ad, etiketler, deger in olcer():
+                degerler[(ad, tuple(sorted(etiketler.items())))] = deger
+        
+        gruplar = {}
+        for (ad, etiketler) in list(histogramlar) + list(degerler):
+            gruplar.setdefault(ad, []).append(etiketler)
+        satirlar = []
+        for ad in sorted(gruplar):
+            tur, aciklama = self.ACIKLAMALAR.get(ad, ('untyped', ad))
+            satirlar.append(f'# HELP {ad} {aciklama}')
+            satirlar.append(f'# TYPE {ad} {tur}')
+            for etiketler in sorted(gruplar[ad]):
+                if (ad, etiketler) in degerler:
+                    satirlar.append(f'{ad}{self._etiket_metni(etiketler)} {degerler[(ad, etiketler)]}')
+                    continue
+                histogram = histogramlar[(ad, etiketler)]
+                birikimli = 0
+                for sinir, sayi in zip(self.SURE_SINIRLARI + ('+Inf',), histogram):
+                    birikimli += sayi
+                    satirlar.append(f'{ad}_bucket{self._etiket_metni(etiketler + (("le", sinir),))} {birikimli}')
+                satirlar.append(f'{ad}_sum{self._etiket_metni(etiketler)} {histogram[-2]}')
+                satirlar.append(f'{ad}_count{self._etiket_metni(etiketler)} {histogram[-1]}')
+        return '\n'.join(satirlar) + '\n'
+
+class ProfilDeposu:
+    """İstek profillerini (.prof) sınırlı sayıda dosya tutan bir halka olarak diskte saklar"""
+    AD_DESENI = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9]+-[A-Za-z0-9_.-]*\.prof$')
+
+    def __init__(self, dizin, maks_dosya=50):
+        # send_file göreli yolları uygulama dizinine göre çözer; yol başta sabitlenir
+        self.dizin = os.path.abspath(dizin)
+        self.maks_dosya = maks_dosya
+        self._sayac = itertools.count(1)
+        self._kilit = threading.Lock()
+
+    def kaydet(self, profil, etiket):
+        """Profili yaz, en eski dosyaları sınırın altına indir ve dosya adını döndür"""
+        os.makedirs(self.dizin, exist_ok=True)
+        etiket = re.sub(r'[^A-Za-z0-9_.-]+', '_', etiket).strip('_')[:60]
+        ad = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(self._sayac):04d}-{etiket}.prof"
+        # Yarım yazılmış dosya listede görünmesin diye önce geçici ada yazılır
+        gecici = os.path.join(self.dizin, f'.{ad}.tmp')
+        try:
+            profil.dump_stats(gecici)
+            os.replace(gecici, os.path.join(self.dizin, ad))
+        except Exception:
+            try:
+                os.remove(gecici)
+            except OSError:
+                pass
+            raise
+        with self._kilit:
+            for eski in self.listele()[self.maks_dosya:]:
+                try:
+                    os.remove(os.path.join(self.dizin, eski['ad']))
+                except OSError:
+                    pass
+        return ad
+
+    def listele(self):
+        """Profil dosyaları, en yeni önce"""
+        try:
+            adlar = [ad for ad in os.listdir(self.dizin) if self.AD_DESENI.match(ad)]
+        except OSError:
+            return []
+        dosyalar = []
+        for ad in adlar:
+            try:
+                durum = os.stat(os.path.join(self.dizin, ad))
+            except OSError:
+                continue
+            dosyalar.append({
+                'ad': ad,
+                'boyut': durum.st_size,
+                'zaman': datetime.fromtimestamp(durum.st_mtime).isoformat(timespec='seconds')
+            })
+        dosyalar.sort(key=lambda dosya: (dosya['zaman'], dosya['ad']), reverse=True)
+        return dosyalar
+
+    def yol(self, ad):
+        """Dosya adı geçerli ve mevcutsa tam yolu, değilse None"""
+        if not self.AD_DESENI.match(ad):
+            return None
+        yol = os.path.join(self.dizin, ad)
+        return yol if os.path.isfile(yol) else None
+
+    def ozet(self, ad, satir_sayisi=40):
+        """Profilin kümülatif süreye göre sıralı metin özeti"""
+        cikti = io.StringIO()
+        pstats.Stats(self.yol(ad), stream=cikti).sort_stats('cumulative').print_stats(satir_sayisi)
+        return cikti.getvalue()
+
+class GeriBildirimYazici:
+    """Geri bildirimleri sınırlı bir kuyrukta toplayıp arka planda toplu halde CSV'ye yazar"""
+    BASLIK = ['timestamp', 'kahve_adi', 'kahveci', 'tercihler', 'alerjenler', 'beğeni_puanı', 'yorum']
+
+    def __init__(self, dosya, yazma_araligi=1.0, kuyruk_boyutu=10000, fsync=False):
+        self.dosya = dosya
+        self.yazma_araligi = yazma_araligi
+        self.fsync = fsync
+        self._kuyruk = queue.Queue(maxsize=kuyruk_boyutu)
+        # Aynı süreçteki yazımlar sıralanır; süreçler arasında dosya kilidi kullanılır
+        self._yazma_kilidi = threading.Lock()
+        self._durdur = threading.Event()
+        self._thread = None
+        self.yazilan = 0
+        if yazma_araligi and yazma_araligi > 0:
+            self._thread = threading.Thread(target=self._calis, name='kahve-feedback-yazici', daemon=True)
+            self._thread.start()
+            atexit.register(self.kapat)
+
+    def ekle(self, kayit):
+        """Kaydı kuyruğa ekle; aralık 0 ise hemen yaz"""
+        if self._thread is None:
+            self.bosalt([kayit])
+            return
+        try:
+            self._kuyruk.put_nowait(kayit)
+        except queue.Full:
+            # Kuyruk doluysa kayıt kaybolmasın: bekleyenlerle birlikte bu istekte yaz
+            self.bosalt([kayit])
+
+    def bosalt(self, ek_kayitlar=()):
+        """Kuyrukta bekleyen tüm kayıtları (ve varsa ek kayıtları) sırayla şimdi yaz"""
+        with self._yazma_kilidi:
+            kayitlar = []
+            while True:
+                try:
+                    kayitlar.append(self._kuyruk.get_nowait())
+                except queue.Empty:
+                    break
+            kayitlar.extend(ek_kayitlar)
+            if kayitlar:
+                self._yaz(kayitlar)
+
+    def kapat(self):
+        self._durdur.set()
+        self.bosalt()
+
+    def _calis(self):
+        while not self._durdur.wait(self.yazma_araligi):
+            try:
+                self.bosalt()
+            except Exception as e:
+                print(f"Feedback yazılırken hata: {e}")
+
+    def _yaz(self, kayitlar):
+        with open(self.dosya, 'a+', encoding='utf-8', newline='') as f:
+            # Aynı dosyaya yazan diğer gunicorn işçileriyle satırlar karışmasın
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yazici = csv.writer(f)
+                boyut = os.fstat(f.fileno()).st_size
+                if boyut == 0:
+                    yazici.writerow(self.BASLIK)
+                else:
+                    # Elle düzenlenmiş dosya satır sonu olmadan bitiyorsa yeni kayıt son satıra yapışmasın;
+                    # son bayt, çok baytlı bir karakterin ortasına denk gelebileceği için ham tampondan okunur
+                    f.buffer.seek(boyut - 1)
+                    son_bayt = f.buffer.read(1)
+                    f.seek(0, os.SEEK_END)
+                    if son_bayt != b'\n':
+                        f.write('\n')
+                yazici.writerows(kayitlar)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        self.yazilan += len(kayitlar)
+
+class GeriBildirimOzeti:
+    """Geri bildirim istatistiklerini yazıldıkça güncellenen toplamlar olarak tutar"""
+
+    def __init__(self, son_kayit_sayisi=5):
+        self._kilit = threading.Lock()
+        self.toplam = 0
+        self.puan_toplami = 0
+        # (kahveci, kahve_adi) -> [adet, puan toplamı]; kahveci -> [adet, puan toplamı]
+        self.kahve_istatistikleri = {}
+        self.kahveci_istatistikleri = {}
+        self.en_cok_begenilen = None
+        self.son_kayitlar = deque(maxlen=son_kayit_sayisi)
+
+    def ekle(self, kayit):
+        """Tek bir geri bildirim kaydını (sözlük) toplamlara ekle"""
+        puan = kayit['beğeni_puanı']
+        with self._kilit:
+            self._toplamlara_ekle(kayit['kahveci'], kayit['kahve_adi'], 1, puan)
+            # İlk ulaşılan en yüksek puan korunur (idxmax ile aynı)
+            if self.en_cok_begenilen is None or puan > self.en_cok_begenilen['puan']:
+                self.en_cok_begenilen = {'kahve_adi': kayit['kahve_adi'], 'kahveci': kayit['kahveci'], 'puan': puan}
+            self.son_kayitlar.append(kayit)
+
+    def _toplamlara_ekle(self, kahveci, kahve_adi, adet, puan_toplami):
+        self.toplam += adet
+        self.puan_toplami += puan_toplami
+        for sozluk, anahtar in ((self.kahve_istatistikleri, (kahveci, kahve_adi)),
+                                (self.kahveci_istatistikleri, kahveci)):
+            degerler = sozluk.setdefault(anahtar, [0, 0])
+            degerler[0] += adet
+            degerler[1] += puan_toplami
+
+    def dosyadan_yukle(self, dosya, parca_satiri=50000):
+        """Başlangıçta kayıt dosyasını parça parça okuyarak toplamları yeniden kur"""
+        if not os.path.exists(dosya) or os.path.getsize(dosya) == 0:
+            return
+        with self._kilit:
+            for parca in pd.read_csv(dosya, chunksize=parca_satiri, keep_default_na=False):
+                parca['beğeni_puanı'] = pd.to_numeric(parca['beğeni_puanı'], errors='coerce')
+                parca = parca[parca['beğeni_puanı'].notna()]
+                if len(parca) == 0:
+                    continue
+
+                gruplar = parca.groupby(['kahveci', 'kahve_adi'], sort=False)['beğeni_puanı'].agg(['count', 'sum'])
+                for (kahveci, kahve_adi), (adet, toplam) in gruplar.iterrows():
+                    self._toplamlara_ekle(kahveci, kahve_adi, int(adet), self._python_degeri(toplam))
+
+                en_iyi = parca['beğeni_puanı'].idxmax()
+                puan = self._python_degeri(parca.at[en_iyi, 'beğeni_puanı'])
+                if self.en_cok_begenilen is None or puan > self.en_cok_begenilen['puan']:
+                    self.en_cok_begenilen = {
+                        'kahve_adi': parca.at[en_iyi, 'kahve_adi'],
+                        'kahveci': parca.at[en_iyi, 'kahveci'],
+                        'puan': puan
+                    }
+                self.son_kayitlar.extend(parca.tail(self.son_kayitlar.maxlen).to_dict('records'))
+
+    @staticmethod
+    def _python_degeri(deger):
+        # numpy sayıları JSON'a doğrudan yazılamaz
+        return deger.item() if isinstance(deger, np.generic) else deger
+
+    def istatistikler(self):
+        """Kayıt sayısından bağımsız, sabit maliyetli özet"""
+        with self._kilit:
+            return {
+                'toplam_feedback': self.toplam,
+                'ortalama_puan': round(self.puan_toplami / self.toplam, 2) if self.toplam else 0,
+                'en_cok_begenilen': dict(self.en_cok_begenilen) if self.en_cok_begenilen else None,
+                'son_feedbackler': list(self.son_kayitlar),
+                'kahveci_istatistikleri': {
+                    kahveci: {'adet': adet, 'ortalama_puan': round(toplam / adet, 2)}
+                    for kahveci, (adet, toplam) in self.kahveci_istatistikleri.items()
+                }
+            }
+
+    def kahve_istatistigi(self, kahveci, kahve_adi):
+        with self._kilit:
+            adet, toplam = self.kahve_istatistikleri.get((kahveci, kahve_adi), (0, 0))
+        return {'adet': adet, 'ortalama_puan': round(toplam / adet, 2) if adet else 0}
+
+class CSVDepolama:
+    """Geri bildirimleri CSV dosyasında, tercih geçmişini süreç belleğinde tutan depolama"""
+    TERCIH_GECMISI_BOYUTU = 100
+
+    def __init__(self, feedback_dosyasi, yazma_araligi=1.0, kuyruk_boyutu=10000, fsync=False):
+        self.feedback_dosyasi = feedback_dosyasi
+        # POST isteği diske yazmayı beklemez; kayıtlar arka planda toplu yazılır
+        self.yazici = GeriBildirimYazici(feedback_dosyasi, yazma_araligi, kuyruk_boyutu, fsync)
+        # İstatistikler her istekte dosyadan okunmaz; yalnızca açılışta bir kez kurulur
+        self.ozet = GeriBildirimOzeti()
+        try:
+            self.ozet.dosyadan_yukle(feedback_dosyasi)
+        except Exception as e:
+            print(f"Feedback istatistikleri yüklenirken hata: {e}")
+        self.tercih_gecmisi = deque(maxlen=self.TERCIH_GECMISI_BOYUTU)
+
+    def feedback_ekle(self, kayit):
+        self.yazici.ekle([kayit[alan] for alan in GeriBildirimYazici.BASLIK])
+        self.ozet.ekle(kayit)
+
+    def feedback_istatistikleri(self):
+        return self.ozet.istatistikler()
+
+    def kahve_istatistigi(self, kahveci, kahve_adi):
+        return self.ozet.kahve_istatistigi(kahveci, kahve_adi)
+
+    def yeni_feedbackler(self, imlec=None):
+        """İmleçten (dosyadaki bayt konumu) sonra yazılan geri bildirimleri ve yeni imleci döndür"""
+        self.yazici.bosalt()
+        imlec = imlec or 0
+        if not os.path.exists(self.feedback_dosyasi):
+            return [], 0
+        with open(self.feedback_dosyasi, 'rb') as f:
+            # Başka bir işçinin yarım kalmış toplu yazımı okunmasın
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            try:
+                if os.fstat(f.fileno()).st_size < imlec:
+                    # Dosya yeniden oluşturulmuş; baştan okunur
+                    imlec = 0
+                f.seek(imlec)
+                veri = f.read()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        
+        okuyucu = csv.reader(io.StringIO(veri.decode('utf-8'), newline=''))
+        if imlec == 0:
+            next(okuyucu, None)  # başlık
+        kayitlar = [dict(zip(GeriBildirimYazici.BASLIK, satir)) for satir in okuyucu if len(satir) == len(GeriBildirimYazici.BASLIK)]
+        return kayitlar, imlec + len(veri)
+
+    def tercih_ekle(self, kayit):
+        self.tercih_gecmisi.append(kayit)
+
+    def tercih_sayisi(self):
+        return len(self.tercih_gecmisi)
+
+    def son_tercihler(self, adet):
+        return list(self.tercih_gecmisi)[-adet:] if adet > 0 else []
+
+class SQLiteDepolama:
+    """Gömülü SQLite (WAL) depolama: tüm işçiler aynı geri bildirim ve tercih verisini görür"""
+    SEMA = '''
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            kahve_adi TEXT NOT NULL,
+            kahveci TEXT NOT NULL,
+            tercihler TEXT NOT NULL DEFAULT '',
+            alerjenler TEXT NOT NULL DEFAULT '',
+            begeni_puani NUMERIC NOT NULL CHECK (begeni_puani BETWEEN 1 AND 5),
+            yorum TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS feedback_kahveci_idx ON feedback (kahveci);
+        CREATE INDEX IF NOT EXISTS feedback_kahve_adi_idx ON feedback (kahve_adi);
+        CREATE INDEX IF NOT EXISTS feedback_timestamp_idx ON feedback (timestamp);
+        CREATE INDEX IF NOT EXISTS feedback_puan_idx ON feedback (begeni_puani DESC, id);
+
+        CREATE TABLE IF NOT EXISTS feedback_ozeti (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            adet INTEGER NOT NULL,
+            puan_toplami NUMERIC NOT NULL
+        );
+        INSERT OR IGNORE INTO feedback_ozeti (id, adet, puan_toplami) VALUES (1, 0, 0);
+        CREATE TABLE IF NOT EXISTS feedback_kahveci_ozeti (
+            kahveci TEXT PRIMARY KEY,
+            adet INTEGER NOT NULL,
+            puan_toplami NUMERIC NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS feedback_kahve_ozeti (
+            kahveci TEXT NOT NULL,
+            kahve_adi TEXT NOT NULL,
+            adet INTEGER NOT NULL,
+            puan_toplami NUMERIC NOT NULL,
+            PRIMARY KEY (kahveci, kahve_adi)
+        );
+        -- Özet tabloları her eklemede güncellenir; istatistikler tabloyu taramaz
+        CREATE TRIGGER IF NOT EXISTS feedback_ozet_guncelle AFTER INSERT ON feedback BEGIN
+            UPDATE feedback_ozeti SET adet = adet + 1, puan_toplami = puan_toplami + NEW.begeni_puani WHERE id = 1;
+            INSERT INTO feedback_kahveci_ozeti (kahveci, adet, puan_toplami) VALUES (NEW.kahveci, 1, NEW.begeni_puani)
+                ON CONFLICT (kahveci) DO UPDATE SET adet = adet + 1, puan_toplami = puan_toplami + excluded.puan_toplami;
+            INSERT INTO feedback_kahve_ozeti (kahveci, kahve_adi, adet, puan_toplami) VALUES (NEW.kahveci, NEW.kahve_adi, 1, NEW.begeni_puani)
+                ON CONFLICT (kahveci, kahve_adi) DO UPDATE SET adet = adet + 1, puan_toplami = puan_toplami + excluded.puan_toplami;
+        END;
+
+        CREATE TABLE IF NOT EXISTS tercih_gecmisi (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            tercihler TEXT NOT NULL,
+            alerjenler TEXT NOT NULL,
+            secilen_kahve TEXT,
+            kahveci TEXT,
+            fiyat NUMERIC,
+            ai_confidence NUMERIC
+        );
+        CREATE INDEX IF NOT EXISTS tercih_gecmisi_kahveci_idx ON tercih_gecmisi (kahveci);
+        CREATE INDEX IF NOT EXISTS tercih_gecmisi_timestamp_idx ON tercih_gecmisi (timestamp);
+    '''
+    SON_KAYIT_SAYISI = 5
+
+    def __init__(self, veritabani_dosyasi, feedback_dosyasi=None):
+        self.veritabani_dosyasi = veritabani_dosyasi
+        # sqlite3 bağlantıları iş parçacıkları arasında paylaşılmaz
+        self._yerel = threading.local()
+        baglanti = self._baglanti()
+        baglanti.executescript(self.SEMA)
+        if feedback_dosyasi:
+            self.csv_aktar(feedback_dosyasi)
+
+    def _baglanti(self):
+        baglanti = getattr(self._yerel, 'baglanti', None)
+        if baglanti is None:
+            # Başka bir işçi yazarken beklenir; WAL'de okuyucular yazarı engellemez
+            baglanti = sqlite3.connect(self.veritabani_dosyasi, timeout=30, isolation_level=None)
+            baglanti.row_factory = sqlite3.Row
+            baglanti.execute('PRAGMA journal_mode=WAL')
+            baglanti.execute('PRAGMA synchronous=NORMAL')
+            self._yerel.baglanti = baglanti
+        return baglanti
+
+    def csv_aktar(self, feedback_dosyasi, parca_satiri=50000):
+        """Veritabanı boşsa mevcut CSV geri bildirimlerini bir kez içe aktar"""
+        if not os.path.exists(feedback_dosyasi) or os.path.getsize(feedback_dosyasi) == 0:
+            return
+        baglanti = self._baglanti()
+        # Aynı anda açılan işçilerden yalnızca biri aktarır
+        baglanti.execute('BEGIN IMMEDIATE')
+        try:
+            if baglanti.execute('SELECT adet FROM feedback_ozeti WHERE id = 1').fetchone()[0] == 0:
+                for parca in pd.read_csv(feedback_dosyasi, chunksize=parca_satiri, keep_default_na=False):
+                    parca['beğeni_puanı'] = pd.to_numeric(parca['beğeni_puanı'], errors='coerce')
+                    parca = parca[parca['beğeni_puanı'].between(1, 5)]
+                    baglanti.executemany(
+                        'INSERT INTO feedback (timestamp, kahve_adi, kahveci, tercihler, alerjenler, begeni_puani, yorum) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        parca[GeriBildirimYazici.BASLIK].astype(object).itertuples(index=False, name=None)
+                    )
+            baglanti.execute('COMMIT')
+        except Exception:
+            baglanti.execute('ROLLBACK')
+            raise
+
+    def feedback_ekle(self, kayit):
+        self._baglanti().execute(
+            'INSERT INTO feedback (timestamp, kahve_adi, kahveci, tercihler, alerjenler, begeni_puani, yorum) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [kayit[alan] for alan in GeriBildirimYazici.BASLIK]
+        )
+
+    def feedback_istatistikleri(self):
+        baglanti = self._baglanti()
+        # Tek okuma işleminde tutarlı bir görüntü
+        baglanti.execute('BEGIN')
+        try:
+            adet, puan_toplami = baglanti.execute('SELECT adet, puan_toplami FROM feedback_ozeti WHERE id = 1').fetchone()
+            en_iyi = baglanti.execute(
+                'SELECT kahve_adi, kahveci, begeni_puani FROM feedback ORDER BY begeni_puani DESC, id LIMIT 1'
+            ).fetchone()
+            son_kayitlar = baglanti.execute(
+                'SELECT timestamp, kahve_adi, kahveci, tercihler, alerjenler, begeni_puani, yorum '
+                'FROM feedback ORDER BY id DESC LIMIT ?', (self.SON_KAYIT_SAYISI,)
+            ).fetchall()
+            kahveciler = baglanti.execute('SELECT kahveci, adet, puan_toplami FROM feedback_kahveci_ozeti').fetchall()
+        finally:
+            baglanti.execute('COMMIT')
+
+        return {
+            'toplam_feedback': adet,
+            'ortalama_puan': round(puan_toplami / adet, 2) if adet else 0,
+            'en_cok_begenilen': {
+                'kahve_adi': en_iyi['kahve_adi'],
+                'kahveci': en_iyi['kahveci'],
+                'puan': en_iyi['begeni_puani']
+            } if en_iyi else None,
+            'son_feedbackler': [
+                dict(zip(GeriBildirimYazici.BASLIK, tuple(satir))) for satir in reversed(son_kayitlar)
+            ],
+            'kahveci_istatistikleri': {
+                satir['kahveci']: {'adet': satir['adet'], 'ortalama_puan': round(satir['puan_toplami'] / satir['adet'], 2)}
+                for satir in kahveciler
+            }
+        }
+
+    def kahve_istatistigi(self, kahveci, kahve_adi):
+        satir = self._baglanti().execute(
+            'SELECT adet, puan_toplami FROM feedback_kahve_ozeti WHERE kahveci = ? AND kahve_adi = ?',
+            (kahveci, kahve_adi)
+        ).fetchone()
+        if satir is None:
+            return {'adet': 0, 'ortalama_puan': 0}
+        return {'adet': satir['adet'], 'ortalama_puan': round(satir['puan_toplami'] / satir['adet'], 2)}
+
+    def yeni_feedbackler(self, imlec=None):
+        """İmleçten (son okunan kimlik) sonra eklenen geri bildirimleri ve yeni imleci döndür"""
+        satirlar = self._baglanti().execute(
+            'SELECT id, timestamp, kahve_adi, kahveci, tercihler, alerjenler, begeni_puani, yorum '
+            'FROM feedback WHERE id > ? ORDER BY id', (imlec or 0,)
+        ).fetchall()
+        if not satirlar:
+            return [], imlec or 0
+        return [dict(zip(GeriBildirimYazici.BASLIK, tuple(satir)[1:])) for satir in satirlar], satirlar[-1]['id']
+
+    def tercih_ekle(self, kayit):
+        self._baglanti().execute(
+            'INSERT INTO tercih_gecmisi (timestamp, tercihler, alerjenler, secilen_kahve, kahveci, fiyat, ai_confidence) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (kayit['timestamp'], json.dumps(kayit['tercihler'], ensure_ascii=False),
+             json.dumps(kayit['alerjenler'], ensure_ascii=False), kayit['secilen_kahve'],
+             kayit['kahveci'], kayit['fiyat'], kayit['ai_confidence'])
+        )
+
+    def tercih_sayisi(self):
+        # AUTOINCREMENT tablosunda satır sayısı için tam tarama yerine son kimlik
+        satir = self._baglanti().execute("SELECT seq FROM sqlite_sequence WHERE name = 'tercih_gecmisi'").fetchone()
+        return satir[0] if satir else 0
+
+    def son_tercihler(self, adet):
+        satirlar = self._baglanti().execute(
+            'SELECT timestamp, tercihler, alerjenler, secilen_kahve, kahveci, fiyat, ai_confidence '
+            'FROM tercih_gecmisi ORDER BY id DESC LIMIT ?', (max(0, adet),)
+        ).fetchall()
+        return [
+            {
+                'timestamp': satir['timestamp'],
+                'tercihler': json.loads(satir['tercihler']),
+                'alerjenler': json.loads(satir['alerjenler']),
+                'secilen_kahve': satir['secilen_kahve'],
+                'kahveci': satir['kahveci'],
+                'fiyat': satir['fiyat'],
+                'ai_confidence': satir['ai_confidence']
+            }
+            for satir in reversed(satirlar)
+        ]
+
+class KahveKaydi:
+    """Katalogdaki tek bir kahveye kopyasız erişim; sözlüğe yalnızca gerektiğinde çevrilir"""
+    __slots__ = ('katalog', 'indeks')
+
+    def __init__(self, katalog, indeks):
+        self.katalog = katalog
+        self.indeks = indeks
+
+    def __getitem__(self, alan):
+        return self.katalog.deger(alan, self.indeks)
+
+    def to_dict(self):
+        """JSON'a hazır sözlük (sütun sırası menü dosyasıyla aynı)"""
+        return {alan: self.katalog.deger(alan, self.indeks) for alan in self.katalog.sutunlar}
+
+class KahveKatalogu:
+    """Bir kahvecinin menüsü: tipli sütun dizileri, özellik/alerjen bit maskeleri ve ortak dizgiler"""
+    LISTE_SUTUNLARI = ('ozellikler', 'alerjenler')
+
+    def __init__(self, kahveci, sutunlar, diziler, ozellik_maskeleri, alerjen_maskeleri, alerjen_sayilari):
+        self.kahveci = sys.intern(kahveci)
+        self.sutunlar = tuple(sutunlar)
+        self.diziler = diziler
+        self.ozellik_maskeleri = ozellik_maskeleri
+        self.alerjen_maskeleri = alerjen_maskeleri
+        self.alerjen_sayilari = alerjen_sayilari
+        self._ad_indeksi = None
+        # Fiyat hesaplarda float olarak kullanılır; sütun yoksa nötr (NaN)
+        self.fiyat = (
+            diziler['fiyat'].astype(float) if 'fiyat' in diziler
+            else np.full(len(ozellik_maskeleri), np.nan)
+        )
+
+    @staticmethod
+    def liste_coz(deger):
+        """Virgülle ayrılmış hücreyi demete çevir (boş veya eksik hücre boş demet)"""
+        if not isinstance(deger, str) or deger.strip() == '':
+            return ()
+        return tuple(sys.intern(parca) for parca in deger.split(','))
+
+    @classmethod
+    def veri_cercevesinden(cls, kahveci, df, ozellik_turleri, alerjen_bitleri):
+        """Okunan CSV'yi kompakt kataloğa dönüştür; DataFrame bundan sonra tutulmaz"""
+        n = len(df)
+        # Aynı içerikli hücreler tek bir nesneyi paylaşır
+        ortak = {}
+        diziler = {}
+        for sutun in df.columns:
+            if sutun == 'kahveci':
+                continue
+            seri = df[sutun]
+            if sutun in cls.LISTE_SUTUNLARI:
+                dizi = np.empty(n, dtype=object)
+                for i, deger in enumerate(seri):
+                    anahtar = (sutun, deger if isinstance(deger, str) else None)
+                    if anahtar not in ortak:
+                        ortak[anahtar] = cls.liste_coz(deger)
+                    dizi[i] = ortak[anahtar]
+            elif seri.dtype.kind in 'biuf':
+                dizi = seri.to_numpy()
+            else:
+                dizi = np.empty(n, dtype=object)
+                dizi[:] = [
+                    sys.intern(deger) if isinstance(deger, str) else (None if pd.isna(deger) else deger)
+                    for deger in seri
+                ]
+            diziler[sutun] = dizi
+
+        bos = np.empty(n, dtype=object)
+        bos[:] = [()] * n
+        ozellikler = diziler.setdefault('ozellikler', bos)
+        alerjenler = diziler.setdefault('alerjenler', bos)
+
+        # Bit i: ozellik_turleri[i]; alerjen bitleri tüm menüler için ortaktır
+        ozellik_bitleri = {ozellik: 1 << i for i, ozellik in enumerate(ozellik_turleri)}
+        ozellik_maskeleri = np.array(
+            [sum(ozellik_bitleri.get(o, 0) for o in set(liste)) for liste in ozellikler], dtype=np.uint8
+        )
+        # 63 koddan fazlası int64'e sığmaz, bu durumda Python tamsayıları kullanılır
+        dtype = np.int64 if len(alerjen_bitleri) < 64 else object
+        alerjen_maskeleri = np.array(
+            [sum(alerjen_bitleri[a] for a in set(liste)) for liste in alerjenler], dtype=dtype
+        )
+        alerjen_sayilari = np.array([len(liste) for liste in alerjenler], dtype=np.int16)
+
+        sutunlar = list(df.columns) + ([] if 'kahveci' in df.columns else ['kahveci'])
+        return cls(kahveci, sutunlar, diziler, ozellik_maskeleri, alerjen_maskeleri, alerjen_sayilari)
+
+    def __len__(self):
+        return len(self.ozellik_maskeleri)
+
+    def sutun(self, alan):
+        """Sütunun tipli dizisi (yoksa None)"""
+        return self.diziler.get(alan)
+
+    def deger(self, alan, indeks):
+        """Tek hücreyi JSON'a uygun Python değeri olarak döndür"""
+        if alan == 'kahveci':
+            return self.kahveci
+        dizi = self.diziler[alan]
+        deger = dizi[indeks]
+        if alan in self.LISTE_SUTUNLARI:
+            return list(deger)
+        if dizi.dtype.kind == 'f':
+            return None if np.isnan(deger) else float(deger)
+        if dizi.dtype.kind in 'biu':
+            return deger.item()
+        return deger
+
+    def kayit(self, indeks):
+        return KahveKaydi(self, int(indeks))
+
+    def indeks_bul(self, kahve_adi):
+        """Kahve adının satır numarası (yoksa None); aynı ad birden çoksa ilki"""
+        if self._ad_indeksi is None:
+            indeks = {}
+            adlar = self.sutun('kahve_adi')
+            for i, ad in enumerate(adlar if adlar is not None else []):
+                indeks.setdefault(ad, i)
+            self._ad_indeksi = indeks
+        return self._ad_indeksi.get(kahve_adi)
+
+    def kayitlar(self, indeksler=None):
+        """Verilen satırlar (varsayılan: tümü) için kayıt görünümleri"""
+        indeksler = range(len(self)) if indeksler is None else indeksler
+        return [KahveKaydi(self, int(i)) for i in indeksler]
+
+    def diske_yaz(self, dizin, onek):
+        """Kataloğu .npy dosyalarına yaz ve yeniden okumak için tanımını döndür"""
+        tanim = {'kahveci': self.kahveci, 'sutunlar': list(self.sutunlar), 'diziler': {}}
+        for sutun, dizi in self.diziler.items():
+            dosya = os.path.join(dizin, f'{onek}{len(tanim["diziler"])}')
+            if sutun in self.LISTE_SUTUNLARI:
+                # Listeler CSV'deki gibi virgülle birleştirilir
+                np.save(dosya, np.array([','.join(liste) for liste in dizi], dtype=str))
+                tanim['diziler'][sutun] = {'tur': 'liste'}
+            elif dizi.dtype.kind in 'biuf':
+                np.save(dosya, dizi)
+                tanim['diziler'][sutun] = {'tur': 'sayi'}
+            else:
+                bos = np.array([deger is None for deger in dizi], dtype=bool)
+                np.save(dosya, np.array(['' if deger is None else str(deger) for deger in dizi], dtype=str))
+                if bos.any():
+                    np.save(dosya + '_bos', bos)
+                tanim['diziler'][sutun] = {'tur': 'metin', 'bos': bool(bos.any())}
+            tanim['diziler'][sutun]['dosya'] = os.path.basename(dosya) + '.npy'
+        for alan in ('ozellik_maskeleri', 'alerjen_maskeleri', 'alerjen_sayilari'):
+            np.save(os.path.join(dizin, f'{onek}{alan}'), getattr(self, alan))
+        return tanim
+
+    @classmethod
+    def diskten_oku(cls, dizin, onek, tanim):
+        """diske_yaz ile yazılmış kataloğu oku; sayısal diziler belleğe eşlenir"""
+        diziler = {}
+        ortak = {}
+        for sutun, bilgi in tanim['diziler'].items():
+            dosya = os.path.join(dizin, bilgi['dosya'])
+            if bilgi['tur'] == 'sayi':
+                diziler[sutun] = np.load(dosya, mmap_mode='r')
+                continue
+            metinler = np.load(dosya)
+            dizi = np.empty(len(metinler), dtype=object)
+            if bilgi['tur'] == 'liste':
+                for i, deger in enumerate(metinler.tolist()):
+                    if deger not in ortak:
+                        ortak[deger] = cls.liste_coz(deger)
+                    dizi[i] = ortak[deger]
+            else:
+                dizi[:] = [sys.intern(deger) for deger in metinler.tolist()]
+                if bilgi.get('bos'):
+                    dizi[np.load(dosya[:-len('.npy')] + '_bos.npy')] = None
+            diziler[sutun] = dizi
+        maskeler = [
+            np.load(os.path.join(dizin, f'{onek}{alan}.npy'), mmap_mode='r')
+            for alan in ('ozellik_maskeleri', 'alerjen_maskeleri', 'alerjen_sayilari')
+        ]
+        return cls(tanim['kahveci'], tanim['sutunlar'], diziler, *maskeler)
+
+class KatalogOnbellegi:
+    """Derlenmiş menü kataloglarının disk önbelleği
+    
+    Kaynak CSV'ler değişmedikçe işçiler CSV ayrıştırmadan kataloğu .npy dosyalarından
+    açar. meta.json geçerli derlemeyi ve kaynak dosyaların durum/özetlerini tutar;
+    her derleme dizini kendi katalog.json tanımını ve ilk hesaplandığında benzer kahve
+    indeksini içerir.
+    """
+    META_DOSYASI = 'meta.json'
+    TANIM_DOSYASI = 'katalog.json'
+    BENZERLIK_KAPSAMLARI = ('kahveci', 'tumu')
+
+    def __init__(self, dizin, sema):
+        self.dizin = dizin
+        # Şema değişirse (özellik türleri, alerjen kodları...) önbellek kullanılmaz
+        self.sema = json.loads(json.dumps(sema))
+        # Son yüklenen veya yazılan derleme dizini (benzerlik indeksi buraya eklenir)
+        self.yapim = None
+
+    def _meta_oku(self):
+        try:
+            with open(os.path.join(self.dizin, self.META_DOSYASI), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _meta_yaz(self, meta):
+        fd, gecici = tempfile.mkstemp(dir=self.dizin, prefix='.meta-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(gecici, os.path.join(self.dizin, self.META_DOSYASI))
+
+    @staticmethod
+    def dosya_ozeti(dosya):
+        with open(dosya, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def yukle(self, dosya_durumlari):
+        """Kaynaklar değişmediyse (kahveciler, alerjen_bitleri, menu_ozetleri, kaynak_kahvecileri) döndür, yoksa None"""
+        self.yapim = None
+        meta = self._meta_oku()
+        if not meta or meta.get('sema') != self.sema:
+            return None
+        kaynaklar = meta['kaynaklar']
+        if set(kaynaklar) != set(dosya_durumlari):
+            return None
+        try:
+            # Yalnızca zamanı/boyutu değişen dosyaların içeriği karşılaştırılır
+            durum_degisti = False
+            for dosya, durum in dosya_durumlari.items():
+                if kaynaklar[dosya]['durum'] != list(durum):
+                    if self.dosya_ozeti(dosya) != kaynaklar[dosya]['ozet']:
+                        return None
+                    kaynaklar[dosya]['durum'] = list(durum)
+                    durum_degisti = True
+            
+            yapim = os.path.join(self.dizin, meta['yapim'])
+            with open(os.path.join(yapim, self.TANIM_DOSYASI), encoding='utf-8') as f:
+                tanim = json.load(f)
+            kahveciler = {}
+            for i, katalog_tanimi in enumerate(tanim['kataloglar']):
+                katalog = KahveKatalogu.diskten_oku(yapim, f'{i}_', katalog_tanimi)
+                kahveciler[katalog.kahveci] = katalog
+            if durum_degisti:
+                self._meta_yaz(meta)
+        except Exception as e:
+            print(f"Katalog önbelleği okunamadı: {e}")
+            return None
+        self.yapim = yapim
+        # Hangi dosyanın hangi kahveciyi oluşturduğu içerik özetlerinden bulunur
+        ozet_kahvecileri = {ozet: kahveci for kahveci, ozet in tanim['menu_ozetleri'].items()}
+        kaynak_kahvecileri = {dosya: ozet_kahvecileri.get(k['ozet']) for dosya, k in kaynaklar.items()}
+        return kahveciler, tanim['alerjen_bitleri'], tanim['menu_ozetleri'], kaynak_kahvecileri
+
+    def benzerlik_indeksi_oku(self):
+        """Geçerli derlemeye yazılmış benzer kahve indeksini belleğe eşleyerek oku, yoksa None"""
+        if self.yapim is None:
+            return None
+        try:
+            return {
+                kapsam: tuple(
+                    np.load(os.path.join(self.yapim, f'benzerlik_{kapsam}_{alan}.npy'), mmap_mode='r')
+                    for alan in ('komsular', 'puanlar')
+                )
+                for kapsam in self.BENZERLIK_KAPSAMLARI
+            }
+        except (OSError, ValueError):
+            return None
+
+    def benzerlik_indeksi_yaz(self, indeks):
+        """Hesaplanan indeksi geçerli derlemeye ekle; dosyalar tek tek atomik olarak yerleşir"""
+        if self.yapim is None or set(indeks) != set(self.BENZERLIK_KAPSAMLARI):
+            return
+        try:
+            for kapsam, diziler in indeks.items():
+                for alan, dizi in zip(('komsular', 'puanlar'), diziler):
+                    fd, gecici = tempfile.mkstemp(dir=self.yapim, prefix='.benzerlik-', suffix='.npy')
+                    with os.fdopen(fd, 'wb') as f:
+                        np.save(f, dizi)
+                    os.replace(gecici, os.path.join(self.yapim, f'benzerlik_{kapsam}_{alan}.npy'))
+        except Exception as e:
+            print(f"Benzerlik indeksi önbelleğe yazılamadı: {e}")
+
+    def kaydet(self, dosya_durumlari, dosya_ozetleri, kahveciler, alerjen_bitleri, menu_ozetleri):
+        """Katalogları yeni bir derleme dizinine yaz ve meta.json'u ona yönlendir"""
+        self.yapim = None
+        if any(katalog.alerjen_maskeleri.dtype == object for katalog in kahveciler.values()):
+            # 63'ten fazla alerjen kodu .npy olarak belleğe eşlenemez
+            return False
+        try:
+            os.makedirs(self.dizin, exist_ok=True)
+            kaynaklar = {
+                dosya: {'durum': list(durum), 'ozet': dosya_ozetleri[dosya]}
+                for dosya, durum in dosya_durumlari.items()
+            }
+            yapim = hashlib.sha256(json.dumps(
+                [self.sema, sorted((d, k['ozet']) for d, k in kaynaklar.items())], ensure_ascii=False
+            ).encode('utf-8')).hexdigest()[:16]
+            hedef = os.path.join(self.dizin, yapim)
+            if not os.path.isdir(hedef):
+                # Önce geçici dizine yazılır; yarım derleme hiçbir zaman görünmez
+                gecici = tempfile.mkdtemp(dir=self.dizin, prefix='.yapim-')
+                with open(os.path.join(gecici, self.TANIM_DOSYASI), 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'kataloglar': [
+                            katalog.diske_yaz(gecici, f'{i}_') for i, katalog in enumerate(kahveciler.values())
+                        ],
+                        'alerjen_bitleri': alerjen_bitleri,
+                        'menu_ozetleri': menu_ozetleri
+                    }, f, ensure_ascii=False)
+                try:
+                    os.rename(gecici, hedef)
+                except OSError:
+                    # Başka bir işçi aynı derlemeyi bitirmiş
+                    shutil.rmtree(gecici, ignore_errors=True)
+            self._meta_yaz({'sema': self.sema, 'kaynaklar': kaynaklar, 'yapim': yapim})
+            self.yapim = hedef
+            # Eski derlemeler temizlenir
+            for ad in os.listdir(self.dizin):
+                yol = os.path.join(self.dizin, ad)
+                if ad != yapim and os.path.isdir(yol) and not ad.startswith('.'):
+                    shutil.rmtree(yol, ignore_errors=True)
+        except Exception as e:
+            print(f"Katalog önbelleği yazılamadı: {e}")
+            return False
+        return True
+
+class MenuAnlikGoruntusu:
+    """Bir menü yüklemesinden türetilen, yayınlandıktan sonra değişmeyen veri kümesi"""
+    _surum_sayaci = itertools.count(1)
+    
+    def __init__(self, kahveciler=None, menu_ozetleri=None, label_encoders=None,
+                 ozellik_deposu=None, tum_ozellik_matrisi=None, alerjen_bitleri=None,
+                 alerjen_maskeleri=None, kahveci_alerjen_maskeleri=None,
+                 model=None, model_parmak_izi=None, tum_puan_tablosu=None, puan_tablolari=None,
+                 menu_surumu=None, benzerlik_indeksi=None, benzerlik_vektorleri=None):
+        # Her yayın yeni bir sürüm alır; önbellek anahtarları bu sürüme bağlıdır
+        self.surum = next(MenuAnlikGoruntusu._surum_sayaci)
+        # Yalnızca menü verisi değişince artar (model yayınları menü sürümünü korur)
+        self.menu_surumu = menu_surumu or self.surum
+        self.kahveciler = kahveciler or {}
+        self.menu_ozetleri = menu_ozetleri or {}
+        self.label_encoders = label_encoders or {}
+        self.ozellik_deposu = ozellik_deposu or {}
+        self.tum_ozellik_matrisi = (
+            tum_ozellik_matrisi if tum_ozellik_matrisi is not None
+            else np.zeros((0, len(AIKahveOnericiSistemi.OZELLIK_TURLERI) + 4))
+        )
+        self.alerjen_bitleri = alerjen_bitleri or {}
+        self.alerjen_maskeleri = alerjen_maskeleri or {}
+        self.kahveci_alerjen_maskeleri = kahveci_alerjen_maskeleri or {}
+        self.model = model
+        self.model_parmak_izi = model_parmak_izi
+        self.tum_puan_tablosu = tum_puan_tablosu
+        self.puan_tablolari = puan_tablolari or {}
+        # Kapsam ('kahveci' / 'tumu') -> (komşu konumları, benzerlikler); N x k, eksikler -1
+        self.benzerlik_indeksi = benzerlik_indeksi or {}
+        self.benzerlik_vektorleri = benzerlik_vektorleri
+        # Birleşik katalog: kahveci i'nin satırları [baslangiclar[i], baslangiclar[i+1]) aralığında
+        self.kahveci_adlari = list(self.kahveciler)
+        self.kahveci_baslangiclari = np.concatenate(
+            [[0], np.cumsum([len(katalog) for katalog in self.kahveciler.values()], dtype=np.int64)]
+        ).astype(np.int64)
+        self.tum_alerjen_maskeleri = (
+            np.concatenate([self.alerjen_maskeleri[ad] for ad in self.kahveci_adlari])
+            if self.kahveci_adlari else np.zeros(0, dtype=np.int64)
+        )
+        self.tum_fiyatlar = (
+            np.concatenate([katalog.fiyat for katalog in self.kahveciler.values()])
+            if self.kahveci_adlari else np.zeros(0)
+        )
+    
+    def kahveci_araligi(self, kahveci_adi):
+        """Kahvecinin birleşik katalogdaki satır aralığı"""
+        i = self.kahveci_adlari.index(kahveci_adi)
+        return int(self.kahveci_baslangiclari[i]), int(self.kahveci_baslangiclari[i + 1])
+    
+    def konum_coz(self, konum):
+        """Birleşik katalogdaki satırın (kahveci adı, kahveci içindeki satır) karşılığı"""
+        i = int(np.searchsorted(self.kahveci_baslangiclari, konum, side='right')) - 1
+        return self.kahveci_adlari[i], int(konum - self.kahveci_baslangiclari[i])
+    
+    def model_ile(self, model, model_parmak_izi, tum_puan_tablosu):
+        """Aynı menü verisi üzerinde başka bir model ve puan tablosu içeren yeni görüntü"""
+        puan_tablolari = {}
+        if tum_puan_tablosu is not None:
+            baslangic = 0
+            for kahveci_adi, matris in self.ozellik_deposu.items():
+                puan_tablolari[kahveci_adi] = tum_puan_tablosu[:, baslangic:baslangic + len(matris)]
+                baslangic += len(matris)
+        return MenuAnlikGoruntusu(
+            self.kahveciler, self.menu_ozetleri, self.label_encoders,
+            self.ozellik_deposu, self.tum_ozellik_matrisi, self.alerjen_bitleri,
+            self.alerjen_maskeleri, self.kahveci_alerjen_maskeleri,
+            model, model_parmak_izi, tum_puan_tablosu, puan_tablolari, self.menu_surumu,
+            self.benzerlik_indeksi, self.benzerlik_vektorleri
+        )
+
+def _anlik_ozelligi(ad):
+    """Yayındaki anlık görüntünün bir alanını salt okunur özellik olarak göster"""
+    return property(lambda self: getattr(self.anlik, ad))
+
 class AIKahveOnericiSistemi:
-    def _init_(self):
-        self.kahveciler = {}
+    OZELLIK_TURLERI = ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']
+    MENU_DOSYALARI = {
+        'Starbucks': 'starbucks_menu.csv',
+        'Mikel Coffee': 'mikel_menu.csv',
+        'Gloria Jeans': 'gloria_menu.csv',
+        'Coffy': 'coffy_menu.csv'
+    }
+    # Dağıtılan menüler '<Kahveci> Menü.csv' adlıdır; kahveciler bu dosyalardan keşfedilir
+    MENU_DOSYA_SONEKI = ' Menü.csv'
+    # Menü dosyalarındaki kahveci adlarının uygulamada kullanılan karşılıkları
+    KAHVECI_TAKMA_ADLARI = {
+        "Gloria Jean's": 'Gloria Jeans',
+        'Mikel': 'Mikel Coffee'
+    }
+    # Menü dosyalarındaki alerjen adlarının kodları ('Yok': alerjen içermiyor)
+    ALERJEN_ADLARI = {
+        'yok': (),
+        'süt': ('sut',),
+        'soya': ('soya',),
+        'gluten': ('gluten',),
+        'kakao': ('kakao',),
+        'fındık': ('findik',),
+        'antep fıstığı': ('antep_fistigi',),
+        'badem': ('badem',),
+        'sert kabuklu meyveler': ('findik', 'antep_fistigi', 'badem'),
+        'yerfıstığı': ('yer_fistigi',)
+    }
+    # İçerikten özellik ve alerjen çıkarımı için anahtar sözcükler
+    KAHVE_DESENI = re.compile(r'espresso|kahve|coffee|cold brew|americano|latte|mocha|macchiato|ristretto|doppio')
+    SUT_DESENI = re.compile(r'süt|krema|köpük|half&half|latte|cream')
+    SOGUK_DESENI = re.compile(r'\b(buz\w*|soğuk|cold|iced?|frap\w*|dondurma|frozen|smoothie|shake|soda)\b')
+    TATLI_DESENI = re.compile(
+        r'çikolata|choc|kakao|mocha|karamel|caramel|şurup|\bsos\b|vanil|toffee|oreo|cookie|aroma|tatlı|'
+        r'dondurma|ice cream|likör|fıstık|pistachio|pekan|frambuaz|hindistancevizi|kiraz|meyve|mango|bubble|bal\b'
+    )
+    GUCLU_DESENI = re.compile(r'ristretto|doppio|double|az süt|shot|turkish|türk kahvesi|cold brew')
+    KAKAO_DESENI = re.compile(r'çikolata|choc|kakao|mocha|oreo')
+    TURKCE_ASCII = str.maketrans('çğıöşü', 'cgiosu')
+    # Derlenmiş katalog önbelleğinin biçimi değişirse artırılmalı
+    KATALOG_SEMA_SURUMU = 1
+    MODEL_DOSYASI = 'kahve_model.pkl'
+    # Özellik/eğitim şeması değiştiğinde artırılmalı (kayıtlı modeli geçersiz kılar)
+    MODEL_SEMA_SURUMU = 1
+    # Puan tablosu derlenirken tek predict çağrısına verilecek en fazla satır
+    PUAN_TABLOSU_PARCA_SATIRI = 65536
+    # Çevrimiçi öğrenme: her turda eklenen ağaç sayısı, geri bildirim ağaçlarının üst sınırı
+    # ve bir tur için gereken en az geri bildirim
+    OGRENME_AGAC_SAYISI = 10
+    OGRENME_MAKS_AGAC = 100
+    OGRENME_MIN_ORNEK = 20
+    MODEL_SURUM_GECMISI = 5
+    # Eğitim ayarları: is_sayisi=-1 tüm çekirdekler, maks_derinlik=None sınırsız,
+    # profil_sayisi=None yalnızca temel simülasyon profilleri
+    EGITIM_AYARLARI = {
+        'agac_sayisi': 100,
+        'maks_derinlik': 10,
+        'is_sayisi': -1,
+        'oob': True,
+        'profil_sayisi': None
+    }
+    
+    # Tüm kahvecilerin birleşik kataloğunda öneri için kahveci adı yerine kullanılır
+    TUM_KAHVECILER = 'tumu'
+    # Tek bir toplu öneri isteğinde kabul edilen en fazla sorgu
+    TOPLU_SORGU_SINIRI = 10000
+    # Benzer kahve indeksinde her kahve için tutulan komşu sayısı ve
+    # benzerlik hesabında tek seferde oluşturulan en fazla matris hücresi
+    BENZER_KOMSU_SAYISI = 20
+    BENZERLIK_PARCA_HUCRESI = 4000000
+    
+    # Menüden türetilen her şey yayındaki anlık görüntüden okunur.
+    # İstek yolundaki metotlar görüntüyü bir kez alıp onunla çalışır.
+    kahveciler = _anlik_ozelligi('kahveciler')
+    menu_ozetleri = _anlik_ozelligi('menu_ozetleri')
+    label_encoders = _anlik_ozelligi('label_encoders')
+    ozellik_deposu = _anlik_ozelligi('ozellik_deposu')
+    tum_ozellik_matrisi = _anlik_ozelligi('tum_ozellik_matrisi')
+    alerjen_bitleri = _anlik_ozelligi('alerjen_bitleri')
+    alerjen_maskeleri = _anlik_ozelligi('alerjen_maskeleri')
+    kahveci_alerjen_maskeleri = _anlik_ozelligi('kahveci_alerjen_maskeleri')
+    model = _anlik_ozelligi('model')
+    tum_puan_tablosu = _anlik_ozelligi('tum_puan_tablosu')
+    puan_tablolari = _anlik_ozelligi('puan_tablolari')
+    
+    @property
+    def user_preferences_history(self):
+        return self.depolama.son_tercihler(CSVDepolama.TERCIH_GECMISI_BOYUTU)
+    
+    def __init__(self, egitim_modu='senkron', onbellek_boyutu=1024, onbellek_ttl=300,
+                 menu_kontrol_araligi=0, feedback_yazma_araligi=1.0, feedback_kuyruk_boyutu=10000,
+                 feedback_fsync=False, depolama='csv', veritabani_dosyasi='kahve_veri.db',
+                 ogrenme_araligi=0, egitim_ayarlari=None, json_onbellek_boyutu=512,
+                 katalog_onbellegi='kahve_katalog_onbellegi', metrikler=None):
         self.alerjen_listesi = {
             'sut': 'Süt',
             'kakao': 'Kakao/Çikolata',
@@ -21,99 +1191,813 @@ class AIKahveOnericiSistemi:
             'antep_fistigi': 'Antep Fıstığı',
             'badem': 'Badem',
             'soya': 'Soya',
-            'gluten': 'Gluten'
+            'gluten': 'Gluten',
+            'yer_fistigi': 'Yer Fıstığı'
         }
-        self.model = None
-        self.label_encoders = {}
+        self.anlik = MenuAnlikGoruntusu()
         self.feature_columns = []
-        self.user_preferences_history = []
+        # 'kapali' modunda sunucu model eğitmez, yalnızca kayıtlı modeli yükler (bkz. egit.py)
+        self.egitim_modu = egitim_modu
+        self.egitim_ayarlari = dict(self.EGITIM_AYARLARI, **(egitim_ayarlari or {}))
+        self.son_egitim_raporu = None
         self.feedback_file = 'kahve_feedback.csv'
+        # Geri bildirim ve tercih geçmişi için depolama: 'csv' (varsayılan) veya 'sqlite'
+        if depolama == 'sqlite':
+            self.depolama = SQLiteDepolama(veritabani_dosyasi, self.feedback_file)
+        else:
+            self.depolama = CSVDepolama(
+                self.feedback_file, feedback_yazma_araligi, feedback_kuyruk_boyutu, feedback_fsync
+            )
+        # Eğitim durumu: 'bekliyor', 'egitiliyor', 'hazir' veya 'hata'
+        self.egitim_durumu = 'bekliyor'
+        self.son_egitim_zamani = None
+        self._egitim_kilidi = threading.Lock()
+        self._egitim_thread = None
+        # Arka plan eğitimi sürerken gelen istek düşürülmez; eğitim bitince bir tur daha yapılır
+        self._egitim_istek_kilidi = threading.Lock()
+        self._bekleyen_egitim = None
+        # Menü ve model yayınları sırayla yapılır; istekler kilit almaz
+        self._yayin_kilidi = threading.Lock()
+        self._menu_kilidi = threading.Lock()
+        self._menu_dosya_durumlari = {}
+        # Menü dosyası -> kahveci adı; okunamayan dosyanın hangi kataloğu koruyacağı buradan bulunur
+        self._kaynak_kahvecileri = {}
+        # Derlenmiş katalog önbelleği dizini (None: her açılışta CSV ayrıştırılır)
+        self.katalog_onbellegi = KatalogOnbellegi(katalog_onbellegi, {
+            'surum': self.KATALOG_SEMA_SURUMU,
+            'ozellikler': self.OZELLIK_TURLERI,
+            'alerjenler': list(self.alerjen_listesi),
+            'takma_adlar': self.KAHVECI_TAKMA_ADLARI,
+            'benzer_komsu_sayisi': self.BENZER_KOMSU_SAYISI
+        }) if katalog_onbellegi else None
+        self.sonuc_onbellegi = SonucOnbellegi(onbellek_boyutu, onbellek_ttl)
+        # Menüye bağlı GET yanıtlarının hazır JSON baytları; menü değişene kadar geçerli
+        self.json_onbellegi = SonucOnbellegi(json_onbellek_boyutu, None)
+        # Aşama süreleri, yedek yönteme düşmeler ve önbellek oranları (kapalıysa etkisiz)
+        self.metrikler = metrikler or Metrikler()
+        self.metrikler.olcer_ekle(self.onbellek_olcumleri)
+        # Yayınlanan modellerin geçmişi (geri alma için) ve geri bildirim okuma imleci
+        self.model_surumleri = deque(maxlen=self.MODEL_SURUM_GECMISI)
+        # Model yayını ile sürüm geçmişi birlikte değişir; uzun süren eğitim kilidinden ayrıdır
+        self._model_surum_kilidi = threading.Lock()
+        self._model_surum_sayaci = itertools.count(1)
+        self._ogrenme_imleci = None
+        self._bekleyen_ornekler = ([], [])
+        self.ogrenilen_feedback = 0
+        # ((tarih, menü sürümü), seçilen kahve)
+        self._gunun_kahvesi = None
         self.menu_yukle()
-        self.ai_model_hazirla()
+        
+        # 'arka_plan' modunda model hazır olana kadar istekler geleneksel yöntemle karşılanır
+        self.model_egitimini_baslat(arka_planda=(egitim_modu == 'arka_plan'))
+        
+        # Menü dosyaları düzenli aralıklarla kontrol edilir, değişince yeniden yüklenir
+        if menu_kontrol_araligi and menu_kontrol_araligi > 0:
+            self.menu_izlemeyi_baslat(menu_kontrol_araligi)
+        
+        # Yeni geri bildirimler bu kadar saniyede bir modele katılır (0: kapalı)
+        if ogrenme_araligi and ogrenme_araligi > 0:
+            self.cevrimici_ogrenmeyi_baslat(ogrenme_araligi)
     
     def menu_yukle(self):
-        """CSV dosyalarından kahveci menülerini yükle"""
-        csv_dosyalari = {
-            'Starbucks': 'starbucks_menu.csv',
-            'Mikel Coffee': 'mikel_menu.csv',
-            'Gloria Jeans': 'gloria_menu.csv',
-            'Coffy': 'coffy_menu.csv'
-        }
+        """Menü dosyalarından kataloğu yükle (değişmediyse derlenmiş önbellekten) ve yayınla"""
+        with self._menu_kilidi:
+            dosya_durumlari = {}
+            for dosya_adi in self.menu_kaynaklari():
+                try:
+                    # Durum okumadan önce alınır; arada değişirse bir sonraki kontrolde fark edilir
+                    dosya_durumlari[dosya_adi] = self._dosya_durumu(dosya_adi)
+                except OSError:
+                    pass
+            
+            derlenmis = self.katalog_onbellegi.yukle(dosya_durumlari) if self.katalog_onbellegi else None
+            hatali_dosyalar = set()
+            if derlenmis is not None:
+                kahveciler, alerjen_bitleri, menu_ozetleri, self._kaynak_kahvecileri = derlenmis
+                print(f"Menü kataloğu derlenmiş önbellekten yüklendi: "
+                      f"{', '.join(f'{ad} ({len(k)})' for ad, k in kahveciler.items())}")
+            else:
+                kahveciler, alerjen_bitleri, menu_ozetleri, hatali_dosyalar = self.menu_dosyalarini_derle(
+                    dosya_durumlari
+                )
+            
+            # Okunamayan dosyanın durumu kaydedilmez; bir sonraki kontrolde yeniden denenir
+            self._menu_dosya_durumlari = {
+                dosya: durum for dosya, durum in dosya_durumlari.items() if dosya not in hatali_dosyalar
+            }
+            if menu_ozetleri == self.anlik.menu_ozetleri:
+                # Yalnızca dosya zamanı değişmiş ya da okunamayan menü önceki haliyle korunmuş
+                return False
+            
+            # Türetilmiş yapılar istek yolunun dışında hazırlanır, sonra tek atamayla yayınlanır
+            benzerlik_indeksi = self.katalog_onbellegi.benzerlik_indeksi_oku() if self.katalog_onbellegi else None
+            yeni = self.menu_anlik_goruntusu_olustur(kahveciler, alerjen_bitleri, menu_ozetleri, benzerlik_indeksi)
+            if benzerlik_indeksi is None and self.katalog_onbellegi:
+                # Aynı derlemeyi açan sonraki işçiler indeksi yeniden hesaplamaz
+                self.katalog_onbellegi.benzerlik_indeksi_yaz(yeni.benzerlik_indeksi)
+            with self._yayin_kilidi:
+                mevcut = self.anlik
+                if mevcut.model is not None:
+                    # Puan tablosu menü satırlarına bağlı; mevcut model yeni menü için derlenir
+                    yeni = yeni.model_ile(
+                        mevcut.model, mevcut.model_parmak_izi,
+                        self.puan_tablosu_olustur(mevcut.model, yeni)
+                    )
+                self.anlik = yeni
+            self.onbellegi_gecersiz_kil()
+            self.json_onbellegi.temizle()
+        
+        # Yayındaki model eski menüyle eğitildiyse arka planda yeniden eğit
+        if yeni.model is not None and yeni.model_parmak_izi != self.model_parmak_izi(yeni):
+            self.model_egitimini_baslat(arka_planda=True)
+        return True
+    
+    def menu_dosyalarini_derle(self, dosya_durumlari):
+        """CSV'leri ayrıştırıp kataloglara dönüştür ve derlenmiş önbelleğe yaz
         
-        for kahveci_adi, dosya_adi in csv_dosyalari.items():
+        Okunamayan ya da ürünü olmayan dosyanın kahvecisi yayındaki kataloğuyla kalır;
+        bu dosyalar dönen hatalı dosyalar kümesinde bildirilir.
+        """
+        veri_cerceveleri = {}
+        menu_ozetleri = {}
+        dosya_ozetleri = {}
+        eski_adlar = {dosya: ad for ad, dosya in self.MENU_DOSYALARI.items()}
+        
+        for dosya_adi in dosya_durumlari:
             try:
-                if os.path.exists(dosya_adi):
-                    df = pd.read_csv(dosya_adi)
-                    # Özellikler sütununu liste haline getir
-                    df['ozellikler'] = df['ozellikler'].apply(lambda x: x.split(',') if pd.notna(x) else [])
-                    # Alerjenler sütununu liste haline getir
-                    df['alerjenler'] = df['alerjenler'].apply(lambda x: x.split(',') if pd.notna(x) and x.strip() != '' else [])
-                    # Kahveci bilgisini ekle
-                    df['kahveci'] = kahveci_adi
-                    self.kahveciler[kahveci_adi] = df
-                    print(f"{kahveci_adi} menüsü yüklendi: {len(df)} ürün")
+                with open(dosya_adi, 'rb') as f:
+                    icerik = f.read()
+                # CSV yalnızca ayrıştırma için okunur; görüntüde kompakt katalog tutulur
+                df = pd.read_csv(io.BytesIO(icerik))
+                df.columns = [unicodedata.normalize('NFC', str(sutun)).strip() for sutun in df.columns]
+                if 'ürün_adı' in df.columns:
+                    kahveci_adi, df = self.menu_semasina_donustur(df, dosya_adi)
                 else:
-                    print(f"Uyarı: {dosya_adi} dosyası bulunamadı")
+                    kahveci_adi = eski_adlar.get(dosya_adi) or self.kahveci_adi_coz(df, dosya_adi)
+                if df.empty or 'kahve_adi' not in df.columns:
+                    raise ValueError('menüde geçerli ürün yok')
+                self._kaynak_kahvecileri[dosya_adi] = kahveci_adi
+                if kahveci_adi in veri_cerceveleri:
+                    print(f"Uyarı: {kahveci_adi} menüsü {dosya_adi} dosyasıyla değiştirildi")
+                veri_cerceveleri[kahveci_adi] = df
+                # Model parmak izi için okunan içeriğin özeti
+                dosya_ozetleri[dosya_adi] = hashlib.sha256(icerik).hexdigest()
+                menu_ozetleri[kahveci_adi] = dosya_ozetleri[dosya_adi]
+                print(f"{kahveci_adi} menüsü yüklendi: {len(df)} ürün")
+            except Exception as e:
+                print(f"Hata: {dosya_adi} menüsü yüklenirken hata: {e}")
+        
+        onceki = self.anlik
+        hatali_dosyalar = set(dosya_durumlari) - set(dosya_ozetleri)
+        korunanlar = {
+            self._kaynak_kahvecileri.get(dosya_adi) for dosya_adi in hatali_dosyalar
+        } & (set(onceki.kahveciler) - set(veri_cerceveleri))
+        # Korunan kataloglardaki maskeler geçerli kalsın diye önceki bitler aynen devralınır
+        alerjen_bitleri = self.alerjen_bitleri_olustur(
+            veri_cerceveleri, onceki.alerjen_bitleri if korunanlar else None
+        )
+        kahveciler = {}
+        for dosya_adi in dosya_durumlari:
+            kahveci_adi = self._kaynak_kahvecileri.get(dosya_adi)
+            if kahveci_adi in kahveciler:
+                continue
+            if kahveci_adi in veri_cerceveleri:
+                kahveciler[kahveci_adi] = KahveKatalogu.veri_cercevesinden(
+                    kahveci_adi, veri_cerceveleri[kahveci_adi], self.OZELLIK_TURLERI, alerjen_bitleri
+                )
+            elif kahveci_adi in korunanlar:
+                kahveciler[kahveci_adi] = onceki.kahveciler[kahveci_adi]
+                menu_ozetleri[kahveci_adi] = onceki.menu_ozetleri[kahveci_adi]
+                print(f"Uyarı: {kahveci_adi} için önceki menü kullanılmaya devam ediyor")
+        # Okunamayan dosya varken derlenen katalog önbelleğe yazılmaz
+        if self.katalog_onbellegi and len(dosya_ozetleri) == len(dosya_durumlari):
+            self.katalog_onbellegi.kaydet(dosya_durumlari, dosya_ozetleri, kahveciler, alerjen_bitleri, menu_ozetleri)
+        return kahveciler, alerjen_bitleri, menu_ozetleri, hatali_dosyalar
+    
+    def menu_kaynaklari(self):
+        """Okunacak menü dosyaları: eski adlandırılmış dosyalar ve keşfedilen '* Menü.csv' dosyaları"""
+        kaynaklar = [dosya for dosya in self.MENU_DOSYALARI.values() if os.path.exists(dosya)]
+        # macOS'tan gelen dosya adları NFD olabilir; karşılaştırma NFC üzerinden yapılır
+        kesfedilenler = sorted(
+            ad for ad in os.listdir('.')
+            if unicodedata.normalize('NFC', ad).endswith(self.MENU_DOSYA_SONEKI) and os.path.isfile(ad)
+        )
+        return kaynaklar + kesfedilenler
+    
+    def kahveci_adi_coz(self, df, dosya_adi):
+        """Kahveci adını menünün 'kahveci' sütunundan, yoksa dosya adından bul"""
+        adlar = [ad for ad in df['kahveci'].dropna().astype(str)] if 'kahveci' in df.columns else []
+        ad = adlar[0] if adlar else os.path.basename(dosya_adi)
+        ad = unicodedata.normalize('NFC', ad).strip()
+        if ad.endswith(self.MENU_DOSYA_SONEKI):
+            ad = ad[:-len(self.MENU_DOSYA_SONEKI)].strip()
+        # Tipografik kesme işareti ("Jean’s") takma ad aramasında düz kabul edilir
+        anahtar = ad.replace('\u2019', "'")
+        return self.KAHVECI_TAKMA_ADLARI.get(anahtar, ad)
+    
+    def menu_semasina_donustur(self, df, dosya_adi):
+        """Dağıtılan menü şemasını (ürün_adı, içerik, alerjenler...) iç şemaya dönüştür"""
+        kahveci_adi = self.kahveci_adi_coz(df, dosya_adi)
+        def metin(sutun):
+            if sutun not in df.columns:
+                return pd.Series([''] * len(df), index=df.index)
+            return df[sutun].fillna('').astype(str).map(lambda d: unicodedata.normalize('NFC', d).strip())
+        
+        adlar, icerikler, alerjenler = metin('ürün_adı'), metin('içerik'), metin('alerjenler')
+        
+        # Aynı içerik/alerjen hücreleri bir kez çözülür
+        cozulenler = {}
+        def coz(ad, icerik, alerjen):
+            anahtar = (ad, icerik, alerjen)
+            if anahtar not in cozulenler:
+                cozulenler[anahtar] = self.menu_satirini_coz(ad, icerik, alerjen)
+            return cozulenler[anahtar]
+        satirlar = [coz(*anahtar) for anahtar in zip(adlar, icerikler, alerjenler)]
+        
+        return kahveci_adi, pd.DataFrame({
+            'kahve_adi': adlar.to_numpy(),
+            'kategori': [satir[0] for satir in satirlar],
+            # Menülerde fiyat yok; NaN puanlamada nötr kabul edilir
+            'fiyat': np.full(len(df), np.nan),
+            'ozellikler': [satir[1] for satir in satirlar],
+            'alerjenler': [satir[2] for satir in satirlar],
+            'aciklama': metin('içerik_listesi').to_numpy(),
+            'icerik': icerikler.to_numpy(),
+            'boyutlar': metin('boyut_seçenekleri').to_numpy()
+        })
+    
+    def menu_satirini_coz(self, ad, icerik, alerjen_hucresi):
+        """Ürün adı ve içerikten (kategori, özellikler, alerjen kodları) çıkar"""
+        parcalar = [parca.strip(' ?') for parca in icerik.split('+') if parca.strip(' ?')]
+        kategori = parcalar[0] if parcalar else 'Diğer'
+        metin = f'{ad} {icerik}'.casefold()
+        
+        kahve = bool(self.KAHVE_DESENI.search(metin))
+        sutlu = bool(self.SUT_DESENI.search(metin))
+        tatli = bool(self.TATLI_DESENI.search(metin))
+        soguk = bool(self.SOGUK_DESENI.search(metin))
+        guclu = kahve and (not sutlu or bool(self.GUCLU_DESENI.search(metin)))
+        ozellikler = {
+            'guclu': guclu,
+            'hafif': not guclu,
+            'sicak': not soguk and (kahve or sutlu or 'çay' in metin or 'sıcak' in metin),
+            'soguk': soguk,
+            'tatli': tatli,
+            'sade': kahve and not sutlu and not tatli
+        }
+        
+        alerjenler = []
+        for alerjen in alerjen_hucresi.split(';'):
+            alerjen = alerjen.strip()
+            if not alerjen:
+                continue
+            kodlar = self.ALERJEN_ADLARI.get(alerjen.casefold())
+            if kodlar is None:
+                # Bilinmeyen adlar koda çevrilip korunur (filtre yine de çalışır)
+                kodlar = (re.sub(r'\W+', '_', alerjen.casefold().translate(self.TURKCE_ASCII)).strip('_'),)
+                print(f"Uyarı: bilinmeyen alerjen adı '{alerjen}' -> {kodlar[0]}")
+            alerjenler.extend(kod for kod in kodlar if kod not in alerjenler)
+        # Menüler kakaoyu alerjen olarak listelemiyor; içerikten eklenir
+        if 'kakao' not in alerjenler and self.KAKAO_DESENI.search(metin):
+            alerjenler.append('kakao')
+        
+        return (
+            kategori,
+            ','.join(ozellik for ozellik in self.OZELLIK_TURLERI if ozellikler[ozellik]),
+            ','.join(alerjenler)
+        )
+    
+    def _dosya_durumu(self, dosya_adi):
+        durum = os.stat(dosya_adi)
+        return (durum.st_mtime_ns, durum.st_size)
+    
+    def menu_degisikliklerini_kontrol_et(self):
+        """Menü dosyalarının zamanı veya boyutu değiştiyse menüleri yeniden yükle"""
+        durumlar = {}
+        for dosya_adi in self.menu_kaynaklari():
+            try:
+                durumlar[dosya_adi] = self._dosya_durumu(dosya_adi)
+            except OSError:
+                pass
+        if durumlar == self._menu_dosya_durumlari:
+            return False
+        return self.menu_yukle()
+    
+    def menu_izlemeyi_baslat(self, aralik):
+        """Menü dosyalarını arka planda belirli aralıklarla kontrol et"""
+        def izle():
+            while True:
+                time.sleep(aralik)
+                try:
+                    self.menu_degisikliklerini_kontrol_et()
+                except Exception as e:
+                    print(f"Menü kontrolü sırasında hata: {e}")
+        
+        threading.Thread(target=izle, name='kahve-menu-izleyici', daemon=True).start()
+    
+    def menu_anlik_goruntusu_olustur(self, kahveciler, alerjen_bitleri, menu_ozetleri, benzerlik_indeksi=None):
+        """Kataloglardan özellik deposu ve alerjen indeksiyle yeni görüntü oluştur
+        
+        benzerlik_indeksi verilirse (derlenmiş önbellekten) yeniden hesaplanmaz.
+        """
+        label_encoders, tum_ozellik_matrisi, ozellik_deposu = self.ozellik_deposu_olustur(kahveciler)
+        alerjen_maskeleri, kahveci_maskeleri = self.alerjen_indeksi_olustur(kahveciler)
+        benzerlik_vektorleri = self.benzerlik_vektorleri(label_encoders, tum_ozellik_matrisi)
+        if benzerlik_indeksi is None:
+            benzerlik_indeksi = self.benzerlik_indeksi_olustur(kahveciler, benzerlik_vektorleri)
+        return MenuAnlikGoruntusu(
+            kahveciler, menu_ozetleri, label_encoders, ozellik_deposu, tum_ozellik_matrisi,
+            alerjen_bitleri, alerjen_maskeleri, kahveci_maskeleri,
+            benzerlik_indeksi=benzerlik_indeksi, benzerlik_vektorleri=benzerlik_vektorleri
+        )
+    
+    def benzerlik_vektorleri(self, label_encoders, tum_ozellik_matrisi):
+        """Özellik matrisinden benzerlik vektörleri: özellik bitleri, tek-sıcak kategori, fiyat, alerjen"""
+        ozellik_sayisi = len(self.OZELLIK_TURLERI)
+        # Kategori ve kahveci kodları sayısal büyüklük taşımaz; kategori tek-sıcak kodlanır,
+        # kahveci ise kahveciler arası aramada etkisiz kalsın diye dışarıda bırakılır
+        kategori_sayisi = len(label_encoders['kategori'].classes_) if 'kategori' in label_encoders else 0
+        kategoriler = np.zeros((len(tum_ozellik_matrisi), kategori_sayisi))
+        if kategori_sayisi:
+            kategoriler[np.arange(len(kategoriler)), tum_ozellik_matrisi[:, 6].astype(int)] = 1
+        alerjen_sayisi = tum_ozellik_matrisi[:, 9]
+        return np.hstack([
+            tum_ozellik_matrisi[:, :ozellik_sayisi],
+            kategoriler,
+            tum_ozellik_matrisi[:, 8:9],
+            (alerjen_sayisi / max(1, alerjen_sayisi.max(initial=0)))[:, None]
+        ])
+    
+    def benzerlik_indeksi_olustur(self, kahveciler, vektorler):
+        """Her kahvenin en benzer k komşusunu (kahveci içinde ve tüm kahvecilerde) önceden hesapla"""
+        n = len(vektorler)
+        k = min(self.BENZER_KOMSU_SAYISI, max(0, n - 1))
+        if k == 0:
+            return {}
+        
+        indeks = {}
+        for kapsam in ('kahveci', self.TUM_KAHVECILER):
+            komsular = np.full((n, k), -1, dtype=np.int32)
+            puanlar = np.zeros((n, k), dtype=np.float32)
+            if kapsam == 'kahveci':
+                baslangiclar = np.cumsum([0] + [len(katalog) for katalog in kahveciler.values()])
+                araliklar = list(zip(baslangiclar[:-1], baslangiclar[1:]))
+            else:
+                araliklar = [(0, n)]
+            for baslangic, bitis in araliklar:
+                self._benzerlik_araligi_doldur(vektorler, int(baslangic), int(bitis), komsular, puanlar)
+            indeks[kapsam] = (komsular, puanlar)
+        return indeks
+    
+    def _benzerlik_araligi_doldur(self, vektorler, baslangic, bitis, komsular, puanlar):
+        """[baslangic, bitis) aralığındaki kahvelerin aynı aralıktaki komşularını parça parça bul"""
+        boyut = bitis - baslangic
+        k = min(komsular.shape[1], boyut - 1)
+        if k <= 0:
+            return
+        aday_vektorleri = vektorler[baslangic:bitis]
+        # N x N matris hiç oluşturulmaz; her parçada en fazla BENZERLIK_PARCA_HUCRESI hücre
+        parca = max(1, self.BENZERLIK_PARCA_HUCRESI // boyut)
+        for ilk in range(0, boyut, parca):
+            son = min(boyut, ilk + parca)
+            benzerlik = cosine_similarity(aday_vektorleri[ilk:son], aday_vektorleri)
+            # Kahve kendisinin komşusu sayılmaz
+            benzerlik[np.arange(son - ilk), np.arange(ilk, son)] = -np.inf
+            # Satır başına k. en büyük benzerlik O(N) kısmi seçimle bulunur (en_iyi_k_sec ile aynı)
+            esik = -np.partition(-benzerlik, k - 1, axis=1)[:, k - 1:k]
+            ustler = benzerlik > esik
+            esitler = benzerlik == esik
+            # Eşikte eşitlik varsa menüde önce gelenler seçilir; her satırda tam k aday kalır
+            eksik = k - ustler.sum(axis=1, keepdims=True)
+            secilen = ustler | (esitler & (np.cumsum(esitler, axis=1) <= eksik))
+            sira = np.nonzero(secilen)[1].reshape(-1, k)
+            # Yalnızca k aday sıralanır: benzerlik azalan, eşitlikte menü sırası
+            duzen = np.argsort(-np.take_along_axis(benzerlik, sira, axis=1), axis=1, kind='stable')
+            sira = np.take_along_axis(sira, duzen, axis=1)
+            komsular[baslangic + ilk:baslangic + son, :k] = sira + baslangic
+            puanlar[baslangic + ilk:baslangic + son, :k] = np.take_along_axis(benzerlik, sira, axis=1)
+    
+    def benzer_kahveler(self, kahveci_adi, kahve_adi, alerjenler=None, max_oneri=5, kapsam='kahveci', anlik=None):
+        """Bir kahveye en benzer kahveler (kahveci içinde veya 'tumu' ile tüm kahvecilerde)"""
+        anlik = anlik or self.anlik
+        if kahveci_adi not in anlik.kahveciler:
+            return {
+                'hata': 'Geçersiz kahveci!',
+                'mevcut_kahveciler': anlik.kahveci_adlari
+            }
+        if kapsam not in ('kahveci', self.TUM_KAHVECILER):
+            return {'hata': f"Geçersiz kapsam! ('kahveci' veya '{self.TUM_KAHVECILER}')"}
+        
+        katalog = anlik.kahveciler[kahveci_adi]
+        satir = katalog.indeks_bul(kahve_adi)
+        if satir is None:
+            return {'hata': 'Kahve bulunamadı!'}
+        
+        kahve = katalog.kayit(satir).to_dict()
+        if kapsam not in anlik.benzerlik_indeksi:
+            # Menüde tek kahve varsa komşu yoktur
+            return {'kahve': kahve, 'benzerler': [], 'toplam_benzer': 0, 'kapsam': kapsam}
+        
+        # Önceden hesaplanmış k komşu üzerinde O(k) arama
+        max_oneri = max(0, int(max_oneri))
+        konum = anlik.kahveci_araligi(kahveci_adi)[0] + satir
+        komsular, puanlar = (dizi[konum] for dizi in anlik.benzerlik_indeksi[kapsam])
+        gecerli = np.flatnonzero(komsular >= 0)
+        # Alerjen filtresi - KATICI FİLTRE
+        sorgu = self.alerjen_sorgu_maskesi(alerjenler, anlik)
+        if sorgu:
+            gecerli = gecerli[(anlik.tum_alerjen_maskeleri[komsular[gecerli]] & sorgu) == 0]
+            if len(gecerli) < max_oneri and len(gecerli) < np.count_nonzero(komsular >= 0):
+                # Filtre indeksteki komşuların çoğunu eledi; yalnızca bu kahve için tam tarama
+                komsular, puanlar = self._filtreli_benzerler(anlik, konum, kahveci_adi, kapsam, sorgu, max_oneri)
+                gecerli = np.arange(len(komsular))
+        
+        benzerler = []
+        for i, pos in enumerate(gecerli[:max_oneri]):
+            benzer_kahveci, benzer_satir = anlik.konum_coz(komsular[pos])
+            oge = anlik.kahveciler[benzer_kahveci].kayit(benzer_satir).to_dict()
+            oge['benzerlik'] = round(float(puanlar[pos]) * 100, 1)
+            oge['rank'] = i + 1
+            oge['alerjen_isimleri'] = [self.alerjen_listesi.get(a, a) for a in oge['alerjenler']]
+            benzerler.append(oge)
+        
+        return {
+            'kahve': kahve,
+            'benzerler': benzerler,
+            'toplam_benzer': len(benzerler),
+            'kapsam': kapsam
+        }
+    
+    def _filtreli_benzerler(self, anlik, konum, kahveci_adi, kapsam, sorgu, k):
+        """Alerjen filtresine uyan adaylar arasında tek kahvenin en benzer k komşusu"""
+        if kapsam == 'kahveci':
+            baslangic, bitis = anlik.kahveci_araligi(kahveci_adi)
+        else:
+            baslangic, bitis = 0, len(anlik.benzerlik_vektorleri)
+        adaylar = baslangic + np.flatnonzero((anlik.tum_alerjen_maskeleri[baslangic:bitis] & sorgu) == 0)
+        adaylar = adaylar[adaylar != konum]
+        if len(adaylar) == 0:
+            return adaylar, np.zeros(0)
+        benzerlik = cosine_similarity(
+            anlik.benzerlik_vektorleri[konum:konum + 1], anlik.benzerlik_vektorleri[adaylar]
+        )[0]
+        secilen = self.en_iyi_k_sec(benzerlik, k)
+        return adaylar[secilen], benzerlik[secilen]
+    
+    def ozellik_deposu_olustur(self, kahveciler):
+        """Katalog satırlarıyla hizalı kahve özellik matrislerini bir kez hesapla"""
+        label_encoders = {}
+        ozellik_deposu = {}
+        tum_ozellik_matrisi = np.zeros((0, len(self.OZELLIK_TURLERI) + 4))
+        if not kahveciler:
+            return label_encoders, tum_ozellik_matrisi, ozellik_deposu
+        
+        try:
+            # Kategori ve kahveci kodlayıcılarını menüye göre hazırla
+            kategoriler = [k.sutun('kategori') for k in kahveciler.values() if k.sutun('kategori') is not None]
+            if kategoriler:
+                le_kategori = LabelEncoder()
+                le_kategori.fit(np.concatenate(kategoriler).astype(str))
+                label_encoders['kategori'] = le_kategori
+            le_kahveci = LabelEncoder()
+            le_kahveci.fit(list(kahveciler))
+            label_encoders['kahveci'] = le_kahveci
+            
+            tum_ozellik_matrisi = np.vstack([
+                self.kahve_ozellik_matrisi_hazirla(katalog, label_encoders)
+                for katalog in kahveciler.values()
+            ])
+            
+            # Her kahveci için birleşik matrisin ilgili dilimi (kopyasız görünüm)
+            baslangic = 0
+            for kahveci_adi, katalog in kahveciler.items():
+                ozellik_deposu[kahveci_adi] = tum_ozellik_matrisi[baslangic:baslangic + len(katalog)]
+                baslangic += len(katalog)
+        except Exception as e:
+            print(f"Özellik deposu oluşturulurken hata: {e}")
+        return label_encoders, tum_ozellik_matrisi, ozellik_deposu
+    
+    def alerjen_bitleri_olustur(self, veri_cerceveleri, onceki_bitler=None):
+        """Her alerjen koduna tüm menülerde ortak bir bit ata"""
+        # Bilinen alerjenler sabit bitleri alır, menüde geçen diğer kodlar sona eklenir
+        bitler = dict(onceki_bitler) if onceki_bitler else {kod: 1 << i for i, kod in enumerate(self.alerjen_listesi)}
+        for df in veri_cerceveleri.values():
+            if 'alerjenler' not in df.columns:
+                continue
+            for hucre in df['alerjenler'].unique():
+                for alerjen in KahveKatalogu.liste_coz(hucre):
+                    if alerjen not in bitler:
+                        bitler[alerjen] = 1 << len(bitler)
+        return bitler
+    
+    def alerjen_indeksi_olustur(self, kahveciler):
+        """Kataloglardaki alerjen bit maskelerinden kahveci bazlı indeksi oluştur"""
+        maskeler = {}
+        kahveci_maskeleri = {}
+        for kahveci_adi, katalog in kahveciler.items():
+            maske = katalog.alerjen_maskeleri
+            maskeler[kahveci_adi] = maske
+            kahveci_maskeleri[kahveci_adi] = int(np.bitwise_or.reduce(maske)) if len(maske) else 0
+        
+        return maskeler, kahveci_maskeleri
+    
+    def alerjen_sorgu_maskesi(self, alerjenler, anlik=None):
+        """Alerjen kodlarını tek bir sorgu maskesine dönüştür"""
+        anlik = anlik or self.anlik
+        # Menüde hiç geçmeyen kodlar hiçbir kahveyi elemez
+        return sum(anlik.alerjen_bitleri.get(alerjen, 0) for alerjen in set(alerjenler or []))
+    
+    def alerjen_filtresi(self, kahveci_adi, alerjenler, anlik=None):
+        """Seçilen alerjenlerin hiçbirini içermeyen kahveler için boolean maske döndür"""
+        anlik = anlik or self.anlik
+        maskeler = anlik.alerjen_maskeleri[kahveci_adi]
+        sorgu = self.alerjen_sorgu_maskesi(alerjenler, anlik)
+        if not sorgu:
+            return np.ones(len(maskeler), dtype=bool)
+        return (maskeler & sorgu) == 0
+    
+    def model_egitimini_baslat(self, arka_planda=False, yeniden_egit=False):
+        """Modeli (yeniden) hazırla; arka planda ise istekleri bekletmeden eğit
+        
+        Senkron çağrıda yeni model eğitilip kaydedildiyse, arka planda ise eğitim başlatıldıysa True.
+        """
+        if not arka_planda:
+            return self.ai_model_hazirla(yeniden_egit)
+        
+        with self._egitim_istek_kilidi:
+            if self._egitim_thread is not None:
+                # Bekleyen istekler birleştirilir; biri yeniden eğitim istediyse o geçerli olur
+                self._bekleyen_egitim = bool(self._bekleyen_egitim) or yeniden_egit
+                print("Model eğitimi zaten devam ediyor; bitince yeniden hazırlanacak")
+                return False
+            
+            self._egitim_thread = threading.Thread(
+                target=self._arka_plan_egitimi, args=(yeniden_egit,),
+                name='kahve-model-egitimi', daemon=True
+            )
+            self._egitim_thread.start()
+        return True
+    
+    def _arka_plan_egitimi(self, yeniden_egit):
+        while True:
+            try:
+                self.ai_model_hazirla(yeniden_egit)
             except Exception as e:
-                print(f"Hata: {kahveci_adi} menüsü yüklenirken hata: {e}")
+                print(f"Arka plan eğitimi hatası: {e}")
+            with self._egitim_istek_kilidi:
+                # Çıkış kararı istek kilidiyle verilir; arada gelen istek kaybolmaz
+                yeniden_egit, self._bekleyen_egitim = self._bekleyen_egitim, None
+                if yeniden_egit is None:
+                    self._egitim_thread = None
+                    return
+    
+    def model_devreye_al(self, model, puan_tablosu=None, parmak_izi=None, kaynak='egitim', temel_model=None):
+        """Hazır modeli yayınla ve sürüm geçmişine ekle
+        
+        temel_model verilirse model yalnızca yayındaki model hâlâ o ise yayınlanır (arada geri
+        alma yapıldıysa False döner).
+        """
+        with self._model_surum_kilidi:
+            if temel_model is not None and self.anlik.model is not temel_model:
+                return False
+            self._modeli_yayinla(model, puan_tablosu, parmak_izi)
+            self.model_surumleri.append({
+                'surum': next(self._model_surum_sayaci),
+                'kaynak': kaynak,
+                'zaman': datetime.now().isoformat(),
+                'agac_sayisi': len(getattr(model, 'estimators_', [])),
+                'model': model,
+                'parmak_izi': parmak_izi
+            })
+        return True
+    
+    def _modeli_yayinla(self, model, puan_tablosu, parmak_izi):
+        """Modeli puan tablosuyla birlikte tek bir atama ile istek yoluna yayınla"""
+        with self._yayin_kilidi:
+            mevcut = self.anlik
+            # Tablo yoksa veya başka bir menü için derlendiyse yayındaki menüye göre derle
+            if puan_tablosu is None or parmak_izi != self.model_parmak_izi(mevcut):
+                puan_tablosu = self.puan_tablosu_olustur(model, mevcut)
+            # Referans ataması atomik: istekler ya eski ya yeni görüntüyü görür
+            self.anlik = mevcut.model_ile(model, parmak_izi, puan_tablosu)
+        self.egitim_durumu = 'hazir'
+        self.son_egitim_zamani = datetime.now().isoformat()
+        self.onbellegi_gecersiz_kil()
+    
+    def model_geri_al(self):
+        """Yayındaki modeli bırakıp bir önceki model sürümüne dön
+        
+        Geri alma yalnızca bellekteki yayını değiştirir: kahve_model.pkl olduğu gibi kalır ve
+        yeniden başlatmada son eğitilen model yüklenir. Geri bildirimle öğrenilen sürümler
+        zaten diske yazılmaz.
+        """
+        with self._model_surum_kilidi:
+            if len(self.model_surumleri) < 2:
+                return None
+            self.model_surumleri.pop()
+            onceki = self.model_surumleri[-1]
+            self._modeli_yayinla(onceki['model'], None, onceki['parmak_izi'])
+        print(f"Model {onceki['surum']} numaralı sürüme geri alındı")
+        return onceki['surum']
     
-    def ai_model_hazirla(self):
-        """AI modeli için veri hazırlama ve eğitim"""
+    def model_surum_bilgileri(self):
+        with self._model_surum_kilidi:
+            surumler = list(self.model_surumleri)
+        return [
+            {alan: deger for alan, deger in surum.items() if alan not in ('model', 'parmak_izi')}
+            for surum in surumler
+        ]
+    
+    def cevrimici_ogrenmeyi_baslat(self, aralik):
+        """Yeni geri bildirimleri arka planda belirli aralıklarla modele kat"""
+        def ogren():
+            while True:
+                time.sleep(aralik)
+                try:
+                    self.geri_bildirimden_ogren()
+                except Exception as e:
+                    print(f"Geri bildirimden öğrenme sırasında hata: {e}")
+        
+        threading.Thread(target=ogren, name='kahve-cevrimici-ogrenme', daemon=True).start()
+    
+    def geri_bildirimden_ogren(self):
+        """Son turdan beri gelen geri bildirimlerle modele ek ağaçlar eğitip yayınla"""
+        with self._egitim_kilidi:
+            anlik = self.anlik
+            if anlik.model is None or not hasattr(anlik.model, 'estimators_'):
+                return False
+            
+            kayitlar, self._ogrenme_imleci = self.depolama.yeni_feedbackler(self._ogrenme_imleci)
+            X, y = self.feedback_ornekleri_olustur(kayitlar, anlik)
+            bekleyen_X, bekleyen_y = self._bekleyen_ornekler
+            bekleyen_X.extend(X)
+            bekleyen_y.extend(y)
+            if len(bekleyen_y) < self.OGRENME_MIN_ORNEK:
+                return False
+            
+            # Maliyet yalnızca yeni örnek sayısına bağlı: eski ağaçlar yeniden eğitilmez
+            model = self.model_artimli_guncelle(anlik.model, np.array(bekleyen_X), np.array(bekleyen_y))
+            if not self.model_devreye_al(model, parmak_izi=anlik.model_parmak_izi, kaynak='geri_bildirim',
+                                         temel_model=anlik.model):
+                # Model arada geri alındı; örnekler bir sonraki turda yayındaki modele eklenir
+                return False
+            self.ogrenilen_feedback += len(bekleyen_y)
+            print(f"Model {len(bekleyen_y)} yeni geri bildirimle güncellendi")
+            self._bekleyen_ornekler = ([], [])
+            return True
+    
+    def feedback_ornekleri_olustur(self, kayitlar, anlik=None):
+        """Geri bildirim kayıtlarını (kullanıcı vektörü + kahve özellikleri, 0-1 puan) örneklere çevir"""
+        anlik = anlik or self.anlik
+        X, y = [], []
+        for kayit in kayitlar:
+            katalog = anlik.kahveciler.get(kayit['kahveci'])
+            indeks = katalog.indeks_bul(kayit['kahve_adi']) if katalog is not None else None
+            try:
+                puan = float(kayit['beğeni_puanı'])
+            except (TypeError, ValueError):
+                continue
+            if indeks is None or not 1 <= puan <= 5:
+                # Menüden kalkmış kahveler ve bozuk kayıtlar atlanır
+                continue
+            tercihler = [t for t in str(kayit['tercihler']).split(',') if t]
+            X.append(np.concatenate([
+                self.kullanici_vektoru_olustur(tercihler),
+                anlik.ozellik_deposu[kayit['kahveci']][indeks]
+            ]))
+            # 1-5 beğeni puanı modelin 0-1 puan ölçeğine taşınır
+            y.append((puan - 1) / 4)
+        return X, y
+    
+    def model_artimli_guncelle(self, model, X, y):
+        """Yayındaki modele dokunmadan, yeni örneklerle eğitilmiş ek ağaçlar içeren kopyasını üret"""
+        yeni = copy.copy(model)
+        yeni.estimators_ = list(model.estimators_)
+        taban = getattr(model, 'taban_agac_sayisi', len(model.estimators_))
+        # warm_start: mevcut ağaçlar korunur, yalnızca yeni ağaçlar X, y üzerinde eğitilir
+        yeni.set_params(warm_start=True, oob_score=False, n_estimators=len(yeni.estimators_) + self.OGRENME_AGAC_SAYISI)
+        yeni.fit(X, y)
+        # Geri bildirim ağaçları sınırı aşarsa en eskileri bırakılır
+        yeni.estimators_ = yeni.estimators_[:taban] + yeni.estimators_[taban:][-self.OGRENME_MAKS_AGAC:]
+        yeni.set_params(warm_start=False, n_estimators=len(yeni.estimators_))
+        yeni.taban_agac_sayisi = taban
+        return yeni
+    
+    def kullanici_indeksi(self, tercihler):
+        """Kullanıcı tercih vektörünü puan tablosundaki satır numarasına çevir"""
+        return sum(1 << i for i, ozellik in enumerate(self.OZELLIK_TURLERI) if ozellik in tercihler)
+    
+    def puan_tablosu_olustur(self, model, anlik=None):
+        """Olası tüm kullanıcı vektörleri x tüm kahveler için model puanlarını önceden hesapla"""
+        anlik = anlik or self.anlik
+        ozellik_sayisi = len(self.OZELLIK_TURLERI)
+        kahve_sayisi = len(anlik.tum_ozellik_matrisi)
+        tablo = np.zeros((2 ** ozellik_sayisi, kahve_sayisi), dtype=np.float32)
+        if kahve_sayisi == 0:
+            return tablo
+        
+        # Satır u: u'nun i. biti OZELLIK_TURLERI[i] tercihini gösterir
+        kullanicilar = ((np.arange(len(tablo))[:, None] >> np.arange(ozellik_sayisi)) & 1).astype(float)
+        # Bellek sınırlı kalsın diye kullanıcı satırları parça parça tahmin edilir
+        parca = max(1, self.PUAN_TABLOSU_PARCA_SATIRI // kahve_sayisi)
         try:
-            # Tüm kahveleri tek bir DataFrame'de birleştir
-            all_coffees = []
-            for kahveci, df in self.kahveciler.items():
-                all_coffees.append(df)
+            for baslangic in range(0, len(tablo), parca):
+                grup = kullanicilar[baslangic:baslangic + parca]
+                X = np.hstack([
+                    np.repeat(grup, kahve_sayisi, axis=0),
+                    np.tile(anlik.tum_ozellik_matrisi, (len(grup), 1))
+                ])
+                tablo[baslangic:baslangic + len(grup)] = model.predict(X).reshape(len(grup), kahve_sayisi)
+        except Exception as e:
+            print(f"Puan tablosu oluşturulurken hata: {e}")
+            return None
+        return tablo
+    
+    def onbellek_olcumleri(self):
+        """Metrik dışa aktarımı için önbellek isabet/ıska sayıları ve boyutları"""
+        olcumler = []
+        for ad, onbellek in (('sonuc', self.sonuc_onbellegi), ('json', self.json_onbellegi)):
+            istatistik = onbellek.istatistikler()
+            olcumler.append(('kahve_onbellek_isabet_toplam', {'onbellek': ad}, istatistik['isabet']))
+            olcumler.append(('kahve_onbellek_iska_toplam', {'onbellek': ad}, istatistik['iska']))
+            olcumler.append(('kahve_onbellek_boyutu', {'onbellek': ad}, istatistik['boyut']))
+        return olcumler
+    
+    def onbellegi_gecersiz_kil(self):
+        """Menü veya model değişince önbelleğe alınmış önerileri temizle"""
+        # Anahtarlar görüntü sürümünü içerdiği için eski sonuçlar zaten isabet etmez
+        self.sonuc_onbellegi.temizle()
+    
+    def sorgu_anahtari(self, kahveci_adi, tercihler, alerjenler, max_oneri):
+        """Öneri sorgusunu sıralı ve tekrarsız hale getirip anahtar üret"""
+        return (
+            kahveci_adi,
+            tuple(sorted(set(tercihler or []))),
+            tuple(sorted(set(alerjenler or []))),
+            max_oneri
+        )
+    
+    def sorgu_tohumu(self, anahtar):
+        """Aynı sorgu için her zaman aynı rastgele gürültüyü üretecek tohum"""
+        return zlib.crc32(repr(anahtar).encode('utf-8'))
+    
+    def ai_model_hazirla(self, yeniden_egit=False):
+        """AI modeli için veri hazırlama ve eğitim; yeni model eğitilip kaydedildiyse True"""
+        with self._egitim_kilidi:
+            self.egitim_durumu = 'egitiliyor'
+            while True:
+                menu_surumu = self.anlik.menu_surumu
+                egitildi = self._ai_model_hazirla(yeniden_egit)
+                anlik = self.anlik
+                # Eğitim sürerken menü değiştiyse eski kodlamalarla eğitilen model yeni menüyle hazırlanır
+                if (anlik.menu_surumu == menu_surumu or anlik.model is None
+                        or anlik.model_parmak_izi == self.model_parmak_izi(anlik)):
+                    break
+                print("Eğitim sırasında menü değişti; model yeni menü için yeniden hazırlanıyor")
+            if self.egitim_durumu == 'egitiliyor':
+                # Yeni model yayınlanamadı; varsa önceki model hizmet vermeye devam eder
+                self.egitim_durumu = 'hazir' if self.model is not None else 'hata'
+        return egitildi
+    
+    def _ai_model_hazirla(self, yeniden_egit=False):
+        try:
+            # Eğitim boyunca aynı menü görüntüsü kullanılır
+            anlik = self.anlik
             
-            if not all_coffees:
+            if not anlik.kahveciler:
                 print("Kahve verisi bulunamadı, AI modeli hazırlanamadı")
-                return
-            
-            combined_df = pd.concat(all_coffees, ignore_index=True)
+                return False
             
             # Özellik mühendisliği
-            feature_df = self.ozellik_muhendisligi(combined_df)
+            feature_df = self.ozellik_muhendisligi(anlik)
+            parmak_izi = self.model_parmak_izi(anlik)
+            
+            # Menü ve şema değişmediyse kayıtlı modeli kullan
+            if not yeniden_egit and self.model_yukle(parmak_izi):
+                print("AI modeli kayıtlı dosyadan yüklendi!")
+                return False
+            
+            if not yeniden_egit and self.egitim_modu == 'kapali':
+                print("Güncel kayıtlı model yok ve eğitim kapalı; geleneksel öneriler kullanılacak")
+                return False
             
             # Simüle edilmiş kullanıcı tercihleri ve puanları oluştur
-            training_data = self.simulasyon_verisi_olustur(feature_df)
+            X, y = self.simulasyon_verisi_olustur(feature_df, self.egitim_ayarlari['profil_sayisi'])
             
-            if len(training_data) > 0:
+            if len(y) > 0:
                 # Modeli eğit
-                self.model_egit(training_data)
+                kaydedildi = self.model_egit(X, y, parmak_izi)
                 print("AI modeli başarıyla eğitildi!")
-            else:
-                print("Eğitim verisi oluşturulamadı")
+                return kaydedildi
+            print("Eğitim verisi oluşturulamadı")
                 
         except Exception as e:
             print(f"AI model hazırlama hatası: {e}")
+        return False
     
-    def ozellik_muhendisligi(self, df):
+    def ozellik_muhendisligi(self, anlik=None):
         """Kahve özelliklerini AI modeli için sayısal verilere dönüştür"""
-        feature_df = df.copy()
-        
-        # Özellik binary encoding
-        ozellik_turleri = ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']
-        for ozellik in ozellik_turleri:
-            feature_df[f'has_{ozellik}'] = feature_df['ozellikler'].apply(
-                lambda x: 1 if ozellik in x else 0
-            )
-        
-        # Kategori encoding
-        if 'kategori' in feature_df.columns:
-            le_kategori = LabelEncoder()
-            feature_df['kategori_encoded'] = le_kategori.fit_transform(feature_df['kategori'])
-            self.label_encoders['kategori'] = le_kategori
-        
-        # Kahveci encoding
-        le_kahveci = LabelEncoder()
-        feature_df['kahveci_encoded'] = le_kahveci.fit_transform(feature_df['kahveci'])
-        self.label_encoders['kahveci'] = le_kahveci
-        
-        # Fiyat normalizasyonu (0-1 arası)
-        feature_df['fiyat_normalized'] = (feature_df['fiyat'] - feature_df['fiyat'].min()) / (feature_df['fiyat'].max() - feature_df['fiyat'].min())
-        
-        # Alerjen sayısı
-        feature_df['alerjen_sayisi'] = feature_df['alerjenler'].apply(len)
+        anlik = anlik or self.anlik
         
         # Model için kullanılacak özellik sütunları
         self.feature_columns = [
@@ -121,12 +2005,18 @@ class AIKahveOnericiSistemi:
             'kategori_encoded', 'kahveci_encoded', 'fiyat_normalized', 'alerjen_sayisi'
         ]
         
+        # Özellik bitleri, kodlamalar ve alerjen sayısı özellik deposunda hazır
+        feature_df = pd.DataFrame(anlik.tum_ozellik_matrisi, columns=self.feature_columns)
+        feature_df['fiyat'] = np.concatenate([katalog.fiyat for katalog in anlik.kahveciler.values()])
+        
+        # Fiyat normalizasyonu (0-1 arası)
+        feature_df['fiyat_normalized'] = (feature_df['fiyat'] - feature_df['fiyat'].min()) / (feature_df['fiyat'].max() - feature_df['fiyat'].min())
+        feature_df['fiyat_normalized'] = feature_df['fiyat_normalized'].fillna(0.5)
+        
         return feature_df
     
-    def simulasyon_verisi_olustur(self, df):
-        """Kullanıcı tercihleri ve puanlarını simüle et"""
-        training_data = []
-        
+    def simulasyon_verisi_olustur(self, df, profil_sayisi=None, tohum=42):
+        """Kullanıcı tercihleri ve puanlarını simüle et (X, y dizileri olarak)"""
         # Farklı kullanıcı profillerini simüle et
         user_profiles = [
             {'tercihler': ['guclu', 'sicak'], 'olumsuz': ['tatli'], 'weight': 0.8},
@@ -136,101 +2026,177 @@ class AIKahveOnericiSistemi:
             {'tercihler': ['soguk', 'tatli'], 'olumsuz': ['guclu'], 'weight': 0.8},
             {'tercihler': ['sicak', 'hafif'], 'olumsuz': ['soguk'], 'weight': 0.7},
         ]
+        rng = np.random.default_rng(tohum)
         
-        for _, kahve in df.iterrows():
-            for profile in user_profiles:
-                # Kullanıcı tercih vektörü oluştur
-                user_vector = self.kullanici_vektoru_olustur(profile['tercihler'])
-                
-                # Puan hesapla
-                score = self.puan_hesapla(kahve, profile)
-                
-                # Eğitim verisi oluştur
-                features = user_vector + [kahve[col] for col in self.feature_columns]
-                training_data.append({
-                    'features': features,
-                    'score': score,
-                    'kahve_index': kahve.name
-                })
-        
-        return training_data
-    
-    def kullanici_vektoru_olustur(self, tercihler):
-        """Kullanıcı tercihlerini vektöre dönüştür"""
-        ozellik_turleri = ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']
-        return [1 if ozellik in tercihler else 0 for ozellik in ozellik_turleri]
-    
-    def puan_hesapla(self, kahve, profile):
-        """Kahve ve kullanıcı profili arasında puan hesapla"""
-        score = 0.5  # Base score
-        
-        # Pozitif tercihler
-        for tercih in profile['tercihler']:
-            if tercih in kahve['ozellikler']:
-                score += 0.3
-        
-        # Negatif tercihler
-        for olumsuz in profile.get('olumsuz', []):
-            if olumsuz in kahve['ozellikler']:
-                score -= 0.2
+        # Profil matrisleri: olumlu/olumsuz tercih bitleri ve ağırlıklar
+        pozitif = np.array([self.kullanici_vektoru_olustur(p['tercihler']) for p in user_profiles], dtype=float)
+        negatif = np.array([self.kullanici_vektoru_olustur(p['olumsuz']) for p in user_profiles], dtype=float)
+        agirliklar = np.array([p['weight'] for p in user_profiles])
         
-        # Fiyat faktörü (düşük fiyat bonus)
-        if kahve['fiyat'] < 25:
-            score += 0.1
-        elif kahve['fiyat'] > 35:
-            score -= 0.1
+        # İstenirse temel profillere rastgele sentetik profiller ekle
+        ek_profil = max(0, (profil_sayisi or len(user_profiles)) - len(user_profiles))
+        if ek_profil:
+            ozellik_sayisi = len(self.OZELLIK_TURLERI)
+            siralar = rng.random((ek_profil, ozellik_sayisi)).argsort(axis=1)
+            pozitif_sayisi = rng.integers(1, 4, size=(ek_profil, 1))
+            negatif_sayisi = rng.integers(0, 3, size=(ek_profil, 1))
+            # Her profilde ilk k özellik olumlu, sonraki özellikler olumsuz
+            ek_pozitif = (siralar < pozitif_sayisi).astype(float)
+            ek_negatif = ((siralar >= pozitif_sayisi) & (siralar < pozitif_sayisi + negatif_sayisi)).astype(float)
+            pozitif = np.vstack([pozitif, ek_pozitif])
+            negatif = np.vstack([negatif, ek_negatif])
+            agirliklar = np.concatenate([agirliklar, rng.uniform(0.6, 0.9, size=ek_profil)])
         
-        # Alerjen penalty
-        if len(kahve['alerjenler']) > 2:
-            score -= 0.1
+        kahve_ozellikleri = df[self.feature_columns].to_numpy(dtype=float)
+        kahve_bitleri = df[[f'has_{ozellik}' for ozellik in self.OZELLIK_TURLERI]].to_numpy(dtype=float)
+        fiyat = df['fiyat'].to_numpy(dtype=float)
+        alerjen_sayisi = df['alerjen_sayisi'].to_numpy()
         
-        # Profil ağırlığını uygula
-        score *= profile['weight']
+        # Puan: tercih eşleşmesi, fiyat ve alerjen kuralları (kahve x profil matrisi olarak)
+        scores = 0.5 + 0.3 * (kahve_bitleri @ pozitif.T) - 0.2 * (kahve_bitleri @ negatif.T)
+        scores += np.where(fiyat < 25, 0.1, np.where(fiyat > 35, -0.1, 0.0))[:, None]
+        scores -= np.where(alerjen_sayisi > 2, 0.1, 0.0)[:, None]
+        scores *= agirliklar[None, :]
         
         # Rastgele gürültü ekle (0.9-1.1 arası)
-        score *= (0.9 + random.random() * 0.2)
+        scores *= rng.uniform(0.9, 1.1, size=scores.shape)
         
-        return max(0, min(1, score))  # 0-1 arası sınırla
-    
-    def model_egit(self, training_data):
-        """Random Forest modelini eğit"""
-        if not training_data:
-            return
+        # Eğitim verisi: her kahve için tüm profiller (kullanıcı vektörü + kahve özellikleri)
+        kahve_sayisi, profil_adedi = scores.shape
+        X = np.hstack([
+            np.tile(pozitif, (kahve_sayisi, 1)),
+            np.repeat(kahve_ozellikleri, profil_adedi, axis=0)
+        ])
+        y = np.clip(scores.ravel(), 0, 1)  # 0-1 arası sınırla
         
-        # Veriyi hazırla
-        X = np.array([item['features'] for item in training_data])
-        y = np.array([item['score'] for item in training_data])
+        return X, y
+    
+    def kullanici_vektoru_olustur(self, tercihler):
+        """Kullanıcı tercihlerini vektöre dönüştür"""
+        ozellik_turleri = ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']
+        return [1 if ozellik in tercihler else 0 for ozellik in ozellik_turleri]
+    
+    def model_egit(self, X, y, parmak_izi=None):
+        """Random Forest modelini eğit, yayınla ve kaydet; kaydedildiyse True"""
+        if len(y) == 0:
+            return False
         
-        # Random Forest modeli oluştur ve eğit
-        self.model = RandomForestRegressor(
-            n_estimators=100,
+        # Random Forest modeli oluştur ve eğit (yayınlanana kadar istek yolu eskisini kullanır)
+        ayarlar = self.egitim_ayarlari
+        model = RandomForestRegressor(
+            n_estimators=ayarlar['agac_sayisi'],
             random_state=42,
-            max_depth=10
+            max_depth=ayarlar['maks_derinlik'],
+            n_jobs=ayarlar['is_sayisi'],
+            oob_score=ayarlar['oob']
         )
-        self.model.fit(X, y)
+        baslangic = time.perf_counter()
+        model.fit(X, y)
+        self.son_egitim_raporu = self.egitim_raporu_olustur(model, y, time.perf_counter() - baslangic)
+        print(f"Eğitim raporu: {self.son_egitim_raporu}")
+        self.model_devreye_al(model, parmak_izi=parmak_izi)
+        # Yeni taban model tüm geri bildirim geçmişini baştan öğrenir
+        self._ogrenme_imleci = None
+        self._bekleyen_ornekler = ([], [])
         
         # Modeli kaydet
+        return self.model_kaydet()
+    
+    def egitim_raporu_olustur(self, model, y, sure):
+        """Eğitim süresi, tepe bellek ve torba dışı (OOB) hata bilgisi"""
+        rapor = {
+            'sure_saniye': round(sure, 3),
+            'ornek_sayisi': len(y),
+            'agac_sayisi': model.n_estimators,
+            'maks_derinlik': model.max_depth,
+            'is_sayisi': model.n_jobs,
+            'tepe_bellek_mb': None,
+            'oob_hata': None,
+            'oob_r2': None
+        }
+        if resource is not None:
+            # ru_maxrss Linux'ta KB, macOS'ta bayt; süreç ömrü boyunca en yüksek değer
+            tepe = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            rapor['tepe_bellek_mb'] = round(tepe / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+        if getattr(model, 'oob_score', False) and hasattr(model, 'oob_prediction_'):
+            rapor['oob_hata'] = round(float(np.nanmean((model.oob_prediction_ - y) ** 2)), 6)
+            rapor['oob_r2'] = round(float(model.oob_score_), 4)
+        return rapor
+    
+    def model_parmak_izi(self, anlik=None):
+        """Menü içerikleri ve özellik şemasından kayıtlı model parmak izi üret"""
+        anlik = anlik or self.anlik
+        h = hashlib.sha256()
+        h.update(json.dumps({
+            'sema_surumu': self.MODEL_SEMA_SURUMU,
+            'ozellik_turleri': self.OZELLIK_TURLERI,
+            'feature_columns': self.feature_columns,
+            'menuler': sorted(anlik.menu_ozetleri.items())
+        }, sort_keys=True).encode('utf-8'))
+        return h.hexdigest()
+    
+    def model_kaydet(self):
+        """Modeli parmak iziyle birlikte bellek eşlemeye uygun biçimde kaydet"""
+        anlik = self.anlik
+        if anlik.model is None or anlik.model_parmak_izi != self.model_parmak_izi(anlik):
+            # Eğitim sürerken menü değişti; bu model yeni menüyle kaydedilmez
+            return False
         try:
-            with open('kahve_model.pkl', 'wb') as f:
-                pickle.dump({
-                    'model': self.model,
-                    'label_encoders': self.label_encoders,
-                    'feature_columns': self.feature_columns
-                }, f)
+            # Sıkıştırmasız joblib: numpy dizileri mmap_mode ile paylaşılarak açılabilir
+            gecici_dosya = f'{self.MODEL_DOSYASI}.{os.getpid()}.tmp'
+            joblib.dump({
+                'parmak_izi': anlik.model_parmak_izi,
+                'model': anlik.model,
+                'label_encoders': anlik.label_encoders,
+                'feature_columns': self.feature_columns,
+                'egitim_ayarlari': self.egitim_ayarlari,
+                'son_egitim_raporu': self.son_egitim_raporu,
+                'puan_tablosu': anlik.tum_puan_tablosu
+            }, gecici_dosya)
+            # Aynı anda başlayan diğer işçiler yarım dosya görmesin
+            os.replace(gecici_dosya, self.MODEL_DOSYASI)
         except Exception as e:
             print(f"Model kaydedilirken hata: {e}")
+            return False
+        return True
+    
+    def model_yukle(self, parmak_izi):
+        """Parmak izi eşleşirse kayıtlı modeli yükle, aksi halde False döndür"""
+        if not os.path.exists(self.MODEL_DOSYASI):
+            return False
+        try:
+            kayit = joblib.load(self.MODEL_DOSYASI, mmap_mode='r')
+        except Exception as e:
+            print(f"Kayıtlı model okunamadı: {e}")
+            return False
+        
+        if not isinstance(kayit, dict) or kayit.get('parmak_izi') != parmak_izi:
+            print("Kayıtlı model güncel menüyle eşleşmiyor, yeniden eğitilecek")
+            return False
+        
+        # Eğitim ayarları değiştiyse yeniden eğitilir; 'kapali' modunda egit.py'nin modeli olduğu gibi kullanılır
+        kayitli_ayarlar = kayit.get('egitim_ayarlari') or {}
+        if self.egitim_modu != 'kapali' and any(
+            kayitli_ayarlar.get(ad) != self.egitim_ayarlari[ad] for ad in ('agac_sayisi', 'maks_derinlik', 'profil_sayisi')
+        ):
+            print("Kayıtlı model farklı eğitim ayarlarıyla eğitilmiş, yeniden eğitilecek")
+            return False
+        
+        self.feature_columns = kayit['feature_columns']
+        self.son_egitim_raporu = kayit.get('son_egitim_raporu')
+        # Puan tablosu bellek eşlemeli açılır; aynı makinedeki işçiler sayfaları paylaşır
+        self.model_devreye_al(kayit['model'], kayit.get('puan_tablosu'), parmak_izi, kaynak='kayit')
+        return True
     
-    def kahveci_alerjenleri_al(self, kahveci_adi):
+    def kahveci_alerjenleri_al(self, kahveci_adi, anlik=None):
         """Belirli bir kahvecinin menüsündeki tüm alerjenleri getir"""
-        if kahveci_adi not in self.kahveciler:
+        anlik = anlik or self.anlik
+        if kahveci_adi not in anlik.kahveciler:
             return []
         
-        df = self.kahveciler[kahveci_adi]
-        tum_alerjenler = set()
-        
-        for _, kahve in df.iterrows():
-            if kahve['alerjenler']:
-                tum_alerjenler.update(kahve['alerjenler'])
+        # Kahvecinin tüm kahvelerinin maskelerinin OR'u önceden hesaplandı
+        kahveci_maskesi = anlik.kahveci_alerjen_maskeleri.get(kahveci_adi, 0)
+        tum_alerjenler = [kod for kod, bit in anlik.alerjen_bitleri.items() if kahveci_maskesi & bit]
         
         # Alerjen isimlerini de ekle
         alerjen_listesi = []
@@ -244,23 +2210,45 @@ class AIKahveOnericiSistemi:
     
     def coklu_ai_kahve_onerisi(self, kahveci_adi, tercihler, alerjenler=None, max_oneri=5):
         """AI modeli ile çoklu kahve önerisi - beğeni sırasına göre"""
-        if not self.model or kahveci_adi not in self.kahveciler:
+        anahtar = self.sorgu_anahtari(kahveci_adi, tercihler, alerjenler, max_oneri)
+        _, tercihler, alerjenler, _ = anahtar
+        tercihler, alerjenler = list(tercihler), list(alerjenler)
+        
+        # İstek boyunca tek bir menü/model görüntüsü kullanılır
+        anlik = self.anlik
+        surum_anahtari = (anlik.surum,) + anahtar
+        sonuc = self.sonuc_onbellegi.al(surum_anahtari)
+        if sonuc is None:
+            sonuc = self._coklu_ai_kahve_onerisi_hesapla(kahveci_adi, tercihler, alerjenler, max_oneri, anlik)
+            self.sonuc_onbellegi.koy(surum_anahtari, sonuc)
+        
+        # Kullanıcı tercihlerini kaydet (yalnızca AI yolundan gelen öneriler)
+        oneriler = sonuc.get('oneriler')
+        if oneriler and 'ai_confidence' in oneriler[0]:
+            self.kullanici_tercihi_kaydet(tercihler, alerjenler, oneriler[0])
+        
+        return sonuc
+    
+    def _coklu_ai_kahve_onerisi_hesapla(self, kahveci_adi, tercihler, alerjenler, max_oneri, anlik):
+        """Önbellek dışında AI önerisini verilen görüntü üzerinde hesapla"""
+        # Eğitim arka planda sürebilir; model görüntüyle birlikte yayınlanır
+        model = anlik.model
+        if not model or kahveci_adi not in anlik.kahveciler:
             # Fallback to traditional method
-            return self.coklu_kahve_onerisi_yap(kahveci_adi, tercihler, alerjenler, max_oneri)
+            if kahveci_adi in anlik.kahveciler:
+                self.metrikler.say('kahve_geleneksel_yedek_toplam', neden='model_yok')
+            return self.coklu_kahve_onerisi_yap(kahveci_adi, tercihler, alerjenler, max_oneri, anlik)
         
+        metrikler = self.metrikler
         try:
-            df = self.kahveciler[kahveci_adi]
+            katalog = anlik.kahveciler[kahveci_adi]
             
             # Alerjen filtresi - KATICI FİLTRE
-            if alerjenler:
-                # Seçilen alerjenlerin hiçbirini içermeyen kahveleri getir
-                filtered_df = df[~df['alerjenler'].apply(
-                    lambda x: any(alerjen in x for alerjen in alerjenler)
-                )]
-            else:
-                filtered_df = df
+            with metrikler.asama('alerjen_filtresi'):
+                uygun = self.alerjen_filtresi(kahveci_adi, alerjenler, anlik)
+                adaylar = np.flatnonzero(uygun)
             
-            if len(filtered_df) == 0:
+            if len(adaylar) == 0:
                 return {
                     'hata': 'Seçtiğiniz alerjilere uygun kahve bulunamadı!',
                     'alerjenler': [self.alerjen_listesi.get(a, a) for a in alerjenler] if alerjenler else []
@@ -269,106 +2257,403 @@ class AIKahveOnericiSistemi:
             # Kullanıcı tercih vektörü
             user_vector = self.kullanici_vektoru_olustur(tercihler)
             
-            # Her kahve için AI puanı hesapla
-            coffee_scores = []
-            for idx, kahve in filtered_df.iterrows():
-                # Kahve özelliklerini hazırla
-                coffee_features = self.kahve_ozelliklerini_hazirla(kahve)
-                
-                # Tam feature vektörü
-                full_features = user_vector + coffee_features
-                
-                # AI puanı tahmin et
-                try:
-                    score = self.model.predict([full_features])[0]
-                    
-                    # Tercih uyumluluk bonusu
-                    tercih_bonus = sum(1 for tercih in tercihler if tercih in kahve['ozellikler']) * 0.1
-                    score += tercih_bonus
-                    
-                    coffee_scores.append((idx, score, kahve.to_dict()))
-                except Exception as e:
-                    print(f"Tahmin hatası: {e}")
-                    # Fallback score
-                    score = random.random() * 0.5 + 0.25
-                    coffee_scores.append((idx, score, kahve.to_dict()))
-            
-            # Puanına göre sırala (yüksekten düşüğe)
-            coffee_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            # En iyi önerileri al
-            top_recommendations = []
-            for i, (idx, confidence, kahve_dict) in enumerate(coffee_scores[:max_oneri]):
-                # Güven skoru ve sıra bilgisi ekle
-                kahve_dict['ai_confidence'] = round(confidence * 100, 1)
-                kahve_dict['rank'] = i + 1
-                kahve_dict['recommendation_reason'] = self.oneri_gerekce_olustur(
-                    kahve_dict, tercihler, confidence, i + 1
-                )
-                
-                # Alerjen isimlerini ekle
-                if kahve_dict['alerjenler']:
-                    kahve_dict['alerjen_isimleri'] = [
-                        self.alerjen_listesi.get(alerjen, alerjen) 
-                        for alerjen in kahve_dict['alerjenler']
-                    ]
-                else:
-                    kahve_dict['alerjen_isimleri'] = []
-                
-                top_recommendations.append(kahve_dict)
+            # Adayların özellik matrisini menü yüklemesinde hazırlanan depodan al
+            with metrikler.asama('ozellik_matrisi'):
+                coffee_matrix = self.kahveci_ozellik_matrisi(kahveci_adi, anlik)[uygun]
+            
+            try:
+                with metrikler.asama('puanlama'):
+                    puan_tablosu = anlik.puan_tablolari.get(kahveci_adi)
+                    if puan_tablosu is not None:
+                        # Derlenmiş tablodan okuma: istek yolunda model çıkarımı yok
+                        scores = puan_tablosu[self.kullanici_indeksi(tercihler)][uygun].astype(float)
+                    else:
+                        # AI puanlarını tek bir predict çağrısıyla tahmin et
+                        user_matrix = np.tile(np.asarray(user_vector, dtype=float), (len(adaylar), 1))
+                        scores = model.predict(np.hstack([user_matrix, coffee_matrix]))
+            except Exception as e:
+                print(f"Tahmin hatası: {e}")
+                metrikler.say('kahve_tahmin_hatasi_toplam')
+                # Fallback score (aynı sorgu için aynı gürültü)
+                rng = np.random.default_rng(self.sorgu_tohumu(
+                    self.sorgu_anahtari(kahveci_adi, tercihler, alerjenler, max_oneri)
+                ))
+                scores = rng.random(len(adaylar)) * 0.5 + 0.25
             
-            # Kullanıcı tercihlerini kaydet
-            if top_recommendations:
-                self.kullanici_tercihi_kaydet(tercihler, alerjenler, top_recommendations[0])
+            # Tercih uyumluluk bonusu (her tercih eşleşmesi için 0.1)
+            tercih_sayilari = np.array([tercihler.count(ozellik) for ozellik in self.OZELLIK_TURLERI], dtype=float)
+            scores = scores + coffee_matrix[:, :len(self.OZELLIK_TURLERI)] @ tercih_sayilari * 0.1
+            
+            # En iyi önerileri al (tam sıralama yerine kısmi seçim)
+            with metrikler.asama('siralama'):
+                secilenler = self.en_iyi_k_sec(scores, max_oneri)
+            with metrikler.asama('sonuc_olusturma'):
+                top_recommendations = [
+                    self.ai_oneri_ogesi(katalog.kayit(adaylar[pos]), float(scores[pos]), i + 1, tercihler)
+                    for i, pos in enumerate(secilenler)
+                ]
             
             return {
                 'oneriler': top_recommendations,
                 'toplam_oneri': len(top_recommendations),
-                'filtrelenen_urun_sayisi': len(filtered_df),
-                'toplam_urun_sayisi': len(df)
+                'filtrelenen_urun_sayisi': len(adaylar),
+                'toplam_urun_sayisi': len(katalog)
             }
             
         except Exception as e:
             print(f"AI çoklu öneri hatası: {e}")
-            return self.coklu_kahve_onerisi_yap(kahveci_adi, tercihler, alerjenler, max_oneri)
+            metrikler.say('kahve_geleneksel_yedek_toplam', neden='hata')
+            return self.coklu_kahve_onerisi_yap(kahveci_adi, tercihler, alerjenler, max_oneri, anlik)
     
-    def kahve_ozelliklerini_hazirla(self, kahve):
-        """Kahve özelliklerini model için hazırla"""
-        features = []
+    def ai_oneri_ogesi(self, kayit, confidence, rank, tercihler):
+        """Seçilen kahve kaydını AI öneri sözlüğüne dönüştür"""
+        kahve_dict = kayit.to_dict()
         
-        # Özellik binary encoding
-        ozellik_turleri = ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']
-        for ozellik in ozellik_turleri:
-            features.append(1 if ozellik in kahve['ozellikler'] else 0)
+        # Güven skoru ve sıra bilgisi ekle
+        kahve_dict['ai_confidence'] = round(confidence * 100, 1)
+        kahve_dict['rank'] = rank
+        kahve_dict['recommendation_reason'] = self.oneri_gerekce_olustur(
+            kahve_dict, tercihler, confidence, rank
+        )
         
-        # Kategori encoding
-        try:
-            if 'kategori' in self.label_encoders:
-                kategori_encoded = self.label_encoders['kategori'].transform([kahve['kategori']])[0]
+        # Alerjen isimlerini ekle
+        if kahve_dict['alerjenler']:
+            kahve_dict['alerjen_isimleri'] = [
+                self.alerjen_listesi.get(alerjen, alerjen) 
+                for alerjen in kahve_dict['alerjenler']
+            ]
+        else:
+            kahve_dict['alerjen_isimleri'] = []
+        
+        return kahve_dict
+    
+    def kahveciler_arasi_oneri(self, tercihler, alerjenler=None, max_oneri=5, kahveciler=None, kahveci_kotasi=None):
+        """Seçilen (varsayılan: tüm) kahvecilerin birleşik kataloğunda tek geçişte en iyi öneriler
+        
+        kahveci_kotasi: her kahveciden en fazla kaç öneri alınacağı (sayı) veya
+        kahveci adı -> kota sözlüğü (sözlükte olmayan kahveciler sınırsız).
+        """
+        anahtar = self.sorgu_anahtari(self.TUM_KAHVECILER, tercihler, alerjenler, max_oneri)
+        _, tercihler, alerjenler, _ = anahtar
+        tercihler, alerjenler = list(tercihler), list(alerjenler)
+        kahveciler = list(dict.fromkeys(kahveciler)) if kahveciler else None
+        
+        anlik = self.anlik
+        if isinstance(kahveci_kotasi, dict):
+            kota_anahtari = tuple(sorted(kahveci_kotasi.items()))
+        else:
+            kota_anahtari = kahveci_kotasi
+        anahtar = anahtar + (tuple(kahveciler or ()), kota_anahtari)
+        surum_anahtari = (anlik.surum,) + anahtar
+        sonuc = self.sonuc_onbellegi.al(surum_anahtari)
+        if sonuc is None:
+            with self.metrikler.asama('kahveciler_arasi'):
+                sonuc = self._kahveciler_arasi_oneri_hesapla(
+                    tercihler, alerjenler, max_oneri, kahveciler, kahveci_kotasi, anlik, self.sorgu_tohumu(anahtar)
+                )
+            self.sonuc_onbellegi.koy(surum_anahtari, sonuc)
+        
+        oneriler = sonuc.get('oneriler')
+        if oneriler and 'ai_confidence' in oneriler[0]:
+            self.kullanici_tercihi_kaydet(tercihler, alerjenler, oneriler[0])
+        
+        return sonuc
+    
+    def _kahveciler_arasi_oneri_hesapla(self, tercihler, alerjenler, max_oneri, kahveciler, kahveci_kotasi, anlik, tohum):
+        secilenler = kahveciler or anlik.kahveci_adlari
+        gecersiz = [k for k in secilenler if k not in anlik.kahveciler]
+        if gecersiz or not secilenler:
+            return {
+                'hata': 'Geçersiz kahveci!',
+                'gecersiz_kahveciler': gecersiz,
+                'mevcut_kahveciler': anlik.kahveci_adlari
+            }
+        
+        # Kahveci ve alerjen filtresi birleşik maske üzerinde tek seferde uygulanır
+        uygun = np.zeros(len(anlik.tum_ozellik_matrisi), dtype=bool)
+        for kahveci_adi in secilenler:
+            baslangic, bitis = anlik.kahveci_araligi(kahveci_adi)
+            uygun[baslangic:bitis] = True
+        sorgu = self.alerjen_sorgu_maskesi(alerjenler, anlik)
+        if sorgu:
+            uygun &= (anlik.tum_alerjen_maskeleri & sorgu) == 0
+        adaylar = np.flatnonzero(uygun)
+        
+        if len(adaylar) == 0:
+            return {
+                'hata': 'Seçtiğiniz alerjilere uygun kahve bulunamadı!',
+                'alerjenler': [self.alerjen_listesi.get(a, a) for a in alerjenler] if alerjenler else []
+            }
+        
+        coffee_matrix = anlik.tum_ozellik_matrisi[adaylar]
+        tercih_sayilari = np.array([tercihler.count(ozellik) for ozellik in self.OZELLIK_TURLERI], dtype=float)
+        eslesme = coffee_matrix[:, :len(self.OZELLIK_TURLERI)] @ tercih_sayilari
+        rng = np.random.default_rng(tohum)
+        
+        model = anlik.model
+        if model is not None:
+            try:
+                if anlik.tum_puan_tablosu is not None:
+                    scores = anlik.tum_puan_tablosu[self.kullanici_indeksi(tercihler)][adaylar].astype(float)
+                else:
+                    user_matrix = np.tile(np.asarray(self.kullanici_vektoru_olustur(tercihler), dtype=float), (len(adaylar), 1))
+                    scores = model.predict(np.hstack([user_matrix, coffee_matrix]))
+            except Exception as e:
+                print(f"Tahmin hatası: {e}")
+                self.metrikler.say('kahve_tahmin_hatasi_toplam')
+                scores = rng.random(len(adaylar)) * 0.5 + 0.25
+            scores = scores + eslesme * 0.1
+        else:
+            # Geleneksel puanlama (coklu_kahve_onerisi_yap ile aynı kurallar)
+            self.metrikler.say('kahve_geleneksel_yedek_toplam', neden='model_yok')
+            alerjen_sayisi = coffee_matrix[:, 9]
+            scores = (
+                eslesme
+                + np.where(anlik.tum_fiyatlar[adaylar] < 25, 0.5, 0.0)
+                + np.where(alerjen_sayisi == 0, 0.3, np.where(alerjen_sayisi <= 1, 0.1, 0.0))
+                + rng.random(len(adaylar)) * 0.3
+            )
+        
+        # Adayın kahvecisi: birleşik katalogdaki satır aralığından
+        kahveci_nolari = np.searchsorted(anlik.kahveci_baslangiclari, adaylar, side='right') - 1
+        if isinstance(kahveci_kotasi, dict):
+            kotalar = {anlik.kahveci_adlari.index(k): int(v) for k, v in kahveci_kotasi.items() if k in anlik.kahveciler}
+        elif kahveci_kotasi is not None:
+            kotalar = {i: int(kahveci_kotasi) for i in range(len(anlik.kahveci_adlari))}
+        else:
+            kotalar = {}
+        
+        top_recommendations = []
+        kahveci_dagilimi = {}
+        for i, pos in enumerate(self.kotali_en_iyi_k_sec(scores, max_oneri, kahveci_nolari, kotalar)):
+            kahveci_adi, satir = anlik.konum_coz(adaylar[pos])
+            kayit = anlik.kahveciler[kahveci_adi].kayit(satir)
+            if model is not None:
+                oge = self.ai_oneri_ogesi(kayit, float(scores[pos]), i + 1, tercihler)
             else:
-                kategori_encoded = 0
-        except:
-            kategori_encoded = 0
-        features.append(kategori_encoded)
+                oge = self.geleneksel_oneri_ogesi(kayit, float(scores[pos]), i + 1, tercihler)
+            kahveci_dagilimi[kahveci_adi] = kahveci_dagilimi.get(kahveci_adi, 0) + 1
+            top_recommendations.append(oge)
         
-        # Kahveci encoding
-        try:
-            if 'kahveci' in self.label_encoders:
-                kahveci_encoded = self.label_encoders['kahveci'].transform([kahve['kahveci']])[0]
+        return {
+            'oneriler': top_recommendations,
+            'toplam_oneri': len(top_recommendations),
+            'filtrelenen_urun_sayisi': len(adaylar),
+            'toplam_urun_sayisi': int(sum(len(anlik.kahveciler[k]) for k in secilenler)),
+            'aranan_kahveciler': secilenler,
+            'kahveci_dagilimi': kahveci_dagilimi
+        }
+    
+    def kotali_en_iyi_k_sec(self, puanlar, k, gruplar, kotalar):
+        """Her gruptan en fazla kotası kadar aday alarak en iyi k adayı seç"""
+        if not kotalar:
+            return self.en_iyi_k_sec(puanlar, k)
+        
+        # Kotalı gruplarda yalnızca grubun en iyi 'kota' adayı yarışa girer
+        havuz = []
+        for grup in np.unique(gruplar):
+            konumlar = np.flatnonzero(gruplar == grup)
+            kota = kotalar.get(int(grup))
+            if kota is None:
+                havuz.append(konumlar)
+            else:
+                havuz.append(konumlar[self.en_iyi_k_sec(puanlar[konumlar], kota)])
+        havuz = np.sort(np.concatenate(havuz))
+        return havuz[self.en_iyi_k_sec(puanlar[havuz], k)]
+    
+    def toplu_ai_kahve_onerisi(self, sorgular):
+        """Birden çok öneri sorgusunu tek seferde yanıtla; sonuçlar sorgu sırasıyla döner
+        
+        Aynı sorgular bir kez hesaplanır; hatalı bir sorgu yalnızca kendi sonucunda
+        'hata' döndürür. Kampanya/ön ısıtma amaçlı olduğu için tercih geçmişine yazılmaz.
+        """
+        anlik = self.anlik
+        sonuclar = [None] * len(sorgular)
+        sorgu_yerleri = {}
+        for i, sorgu in enumerate(sorgular):
+            hata = self.toplu_sorgu_hatasi(sorgu, anlik)
+            if hata is not None:
+                sonuclar[i] = hata
+                continue
+            anahtar = self.sorgu_anahtari(
+                sorgu['kahveci'], sorgu['tercihler'], sorgu.get('alerjenler'), sorgu.get('max_oneri', 5)
+            )
+            sorgu_yerleri.setdefault(anahtar, []).append(i)
+        
+        hesaplananlar = {}
+        eksikler = []
+        for anahtar in sorgu_yerleri:
+            sonuc = self.sonuc_onbellegi.al((anlik.surum,) + anahtar)
+            if sonuc is None:
+                eksikler.append(anahtar)
             else:
-                kahveci_encoded = 0
-        except:
-            kahveci_encoded = 0
-        features.append(kahveci_encoded)
+                hesaplananlar[anahtar] = sonuc
+        
+        yeni_sonuclar = self._toplu_oneri_hesapla(eksikler, anlik)
+        for anahtar, sonuc in yeni_sonuclar.items():
+            self.sonuc_onbellegi.koy((anlik.surum,) + anahtar, sonuc)
+        hesaplananlar.update(yeni_sonuclar)
+        
+        for anahtar, yerler in sorgu_yerleri.items():
+            for i in yerler:
+                sonuclar[i] = hesaplananlar[anahtar]
+        
+        return {
+            'sonuclar': sonuclar,
+            'toplam_sorgu': len(sorgular),
+            'benzersiz_sorgu': len(sorgu_yerleri),
+            'hesaplanan_sorgu': len(eksikler),
+            'hatali_sorgu': sum(1 for sonuc in sonuclar if 'hata' in sonuc)
+        }
+    
+    def toplu_sorgu_hatasi(self, sorgu, anlik):
+        """Toplu istekteki tek sorguyu doğrula; geçersizse hata sözlüğü döndür"""
+        if not isinstance(sorgu, dict):
+            return {'hata': 'Sorgu bir JSON nesnesi olmalıdır!'}
+        kahveci_adi = sorgu.get('kahveci')
+        if not kahveci_adi:
+            return {'hata': 'Kahveci seçilmedi!'}
+        if not isinstance(kahveci_adi, str):
+            return {'hata': 'kahveci bir metin olmalıdır!'}
+        if not sorgu.get('tercihler'):
+            return {'hata': 'En az bir tercih seçilmelidir!'}
+        # Sorgu anahtarı sıralanıp hashlendiği için listeler yalnızca metin içerebilir
+        for alan in ('tercihler', 'alerjenler'):
+            deger = sorgu.get(alan)
+            if deger is not None and (not isinstance(deger, list)
+                                      or not all(isinstance(oge, str) for oge in deger)):
+                return {'hata': f'{alan} metinlerden oluşan bir liste olmalıdır!'}
+        if kahveci_adi not in anlik.kahveciler:
+            return {
+                'hata': 'Geçersiz kahveci!',
+                'mevcut_kahveciler': list(anlik.kahveciler.keys())
+            }
+        max_oneri = sorgu.get('max_oneri', 5)
+        if not isinstance(max_oneri, int) or isinstance(max_oneri, bool) or max_oneri < 1:
+            return {'hata': 'max_oneri pozitif bir tam sayı olmalıdır!'}
+        return None
+    
+    def _toplu_oneri_hesapla(self, anahtarlar, anlik):
+        """Aynı kahveci ve alerjen filtresini paylaşan sorguları tek puan matrisiyle hesapla"""
+        gruplar = {}
+        for anahtar in anahtarlar:
+            kahveci_adi, _, alerjenler, _ = anahtar
+            gruplar.setdefault((kahveci_adi, alerjenler), []).append(anahtar)
+        
+        sonuclar = {}
+        for (kahveci_adi, alerjenler), grup in gruplar.items():
+            puan_tablosu = anlik.puan_tablolari.get(kahveci_adi)
+            if anlik.model is None or puan_tablosu is None:
+                # Derlenmiş tablo yoksa her sorgu tekil yoldan hesaplanır
+                for anahtar in grup:
+                    _, tercihler, _, max_oneri = anahtar
+                    sonuclar[anahtar] = self._coklu_ai_kahve_onerisi_hesapla(
+                        kahveci_adi, list(tercihler), list(alerjenler), max_oneri, anlik
+                    )
+                continue
+            
+            try:
+                with self.metrikler.asama('toplu_grup'):
+                    sonuclar.update(self._toplu_grup_hesapla(kahveci_adi, list(alerjenler), grup, puan_tablosu, anlik))
+            except Exception as e:
+                print(f"Toplu öneri hatası: {e}")
+                self.metrikler.say('kahve_geleneksel_yedek_toplam', neden='hata')
+                for anahtar in grup:
+                    _, tercihler, _, max_oneri = anahtar
+                    sonuclar[anahtar] = self._coklu_ai_kahve_onerisi_hesapla(
+                        kahveci_adi, list(tercihler), list(alerjenler), max_oneri, anlik
+                    )
+        return sonuclar
+    
+    def _toplu_grup_hesapla(self, kahveci_adi, alerjenler, grup, puan_tablosu, anlik):
+        katalog = anlik.kahveciler[kahveci_adi]
+        uygun = self.alerjen_filtresi(kahveci_adi, alerjenler, anlik)
+        adaylar = np.flatnonzero(uygun)
+        if len(adaylar) == 0:
+            hata = {
+                'hata': 'Seçtiğiniz alerjilere uygun kahve bulunamadı!',
+                'alerjenler': [self.alerjen_listesi.get(a, a) for a in alerjenler] if alerjenler else []
+            }
+            return {anahtar: hata for anahtar in grup}
+        
+        coffee_matrix = self.kahveci_ozellik_matrisi(kahveci_adi, anlik)[uygun]
+        kullanicilar = [self.kullanici_indeksi(anahtar[1]) for anahtar in grup]
+        tercih_sayilari = np.array(
+            [[int(ozellik in anahtar[1]) for ozellik in self.OZELLIK_TURLERI] for anahtar in grup], dtype=float
+        )
+        # Satır r: grup[r] sorgusunun tüm adaylar için puanları
+        puanlar = (
+            puan_tablosu[kullanicilar][:, uygun].astype(float)
+            + (tercih_sayilari @ coffee_matrix[:, :len(self.OZELLIK_TURLERI)].T) * 0.1
+        )
+        
+        sonuclar = {}
+        for satir, anahtar in enumerate(grup):
+            _, tercihler, _, max_oneri = anahtar
+            scores = puanlar[satir]
+            top_recommendations = [
+                self.ai_oneri_ogesi(katalog.kayit(adaylar[pos]), float(scores[pos]), i + 1, list(tercihler))
+                for i, pos in enumerate(self.en_iyi_k_sec(scores, max_oneri))
+            ]
+            sonuclar[anahtar] = {
+                'oneriler': top_recommendations,
+                'toplam_oneri': len(top_recommendations),
+                'filtrelenen_urun_sayisi': len(adaylar),
+                'toplam_urun_sayisi': len(katalog)
+            }
+        return sonuclar
+    
+    def kahveci_ozellik_matrisi(self, kahveci_adi, anlik=None):
+        """Kahvecinin menü satırlarıyla hizalı özellik matrisini getir"""
+        anlik = anlik or self.anlik
+        if kahveci_adi in anlik.ozellik_deposu:
+            return anlik.ozellik_deposu[kahveci_adi]
+        return self.kahve_ozellik_matrisi_hazirla(anlik.kahveciler[kahveci_adi], anlik.label_encoders)
+    
+    def en_iyi_k_sec(self, puanlar, k):
+        """Puanı en yüksek k adayın konumlarını sıralı döndür (tam sıralama yapmadan)"""
+        n = len(puanlar)
+        k = max(0, min(int(k), n))
+        if k == 0:
+            return np.array([], dtype=int)
+        
+        # k. en büyük puanı O(n) kısmi seçimle bul
+        esik = -np.partition(-puanlar, k - 1)[k - 1]
+        ustler = np.flatnonzero(puanlar > esik)
+        # Eşikte eşitlik varsa menüde önce gelenler seçilir (kararlı sıralama ile aynı)
+        esitler = np.flatnonzero(puanlar == esik)[:k - len(ustler)]
+        adaylar = np.concatenate([ustler, esitler])
+        
+        # Yalnızca k aday sıralanır: puan azalan, eşitlikte menü sırası
+        return adaylar[np.lexsort((adaylar, -puanlar[adaylar]))]
+    
+    def kahve_ozellik_matrisi_hazirla(self, katalog, label_encoders=None):
+        """Katalogdaki kahvelerin özelliklerini model için toplu olarak matrise dönüştür"""
+        label_encoders = self.label_encoders if label_encoders is None else label_encoders
+        n = len(katalog)
+        ozellik_sayisi = len(self.OZELLIK_TURLERI)
+        matris = np.zeros((n, ozellik_sayisi + 4))
+        if n == 0:
+            return matris
         
-        # Fiyat normalizasyonu (rough estimation)
-        fiyat_normalized = min(1, max(0, (kahve['fiyat'] - 15) / 30))
-        features.append(fiyat_normalized)
+        # Özellik binary encoding (bit maskesinden)
+        matris[:, :ozellik_sayisi] = (katalog.ozellik_maskeleri[:, None] >> np.arange(ozellik_sayisi)) & 1
+        
+        # Kategori ve kahveci encoding (bilinmeyen değerler 0)
+        if 'kategori' in label_encoders and katalog.sutun('kategori') is not None:
+            eslesme = {deger: i for i, deger in enumerate(label_encoders['kategori'].classes_)}
+            matris[:, 6] = [eslesme.get(kategori, 0) for kategori in katalog.sutun('kategori')]
+        if 'kahveci' in label_encoders:
+            eslesme = {deger: i for i, deger in enumerate(label_encoders['kahveci'].classes_)}
+            matris[:, 7] = eslesme.get(katalog.kahveci, 0)
+        
+        # Fiyat normalizasyonu (rough estimation); fiyatı bilinmeyen kahve ortada (0.5)
+        matris[:, 8] = np.nan_to_num(np.clip((katalog.fiyat - 15) / 30, 0, 1), nan=0.5)
         
         # Alerjen sayısı
-        features.append(len(kahve['alerjenler']))
+        matris[:, 9] = katalog.alerjen_sayilari
         
-        return features
+        return matris
     
     def oneri_gerekce_olustur(self, kahve, tercihler, confidence, rank):
         """AI önerisi için gerekçe oluştur"""
@@ -395,10 +2680,11 @@ class AIKahveOnericiSistemi:
             reasons.append("Orta güvenle öneriliyor")
         
         # Fiyat faktörü
-        if kahve['fiyat'] < 25:
-            reasons.append("Uygun fiyatlı")
-        elif kahve['fiyat'] > 35:
-            reasons.append("Premium seçenek")
+        if kahve['fiyat'] is not None:
+            if kahve['fiyat'] < 25:
+                reasons.append("Uygun fiyatlı")
+            elif kahve['fiyat'] > 35:
+                reasons.append("Premium seçenek")
         
         # Alerjen durumu
         if not kahve['alerjenler']:
@@ -406,139 +2692,136 @@ class AIKahveOnericiSistemi:
         
         return " • ".join(reasons) if reasons else "AI algoritması tarafından önerildi"
     
-    def coklu_kahve_onerisi_yap(self, kahveci_adi, tercihler, alerjenler=None, max_oneri=5):
+    def coklu_kahve_onerisi_yap(self, kahveci_adi, tercihler, alerjenler=None, max_oneri=5, anlik=None):
         """Geleneksel çoklu kahve önerisi (fallback)"""
-        if kahveci_adi not in self.kahveciler:
+        anlik = anlik or self.anlik
+        if kahveci_adi not in anlik.kahveciler:
             return {'hata': 'Kahveci bulunamadı!'}
         
-        df = self.kahveciler[kahveci_adi]
+        katalog = anlik.kahveciler[kahveci_adi]
+        metrikler = self.metrikler
         
         # Alerjen filtresi - KATICI FİLTRE
-        if alerjenler:
-            alerjen_filtreli_df = df[~df['alerjenler'].apply(
-                lambda x: any(alerjen in x for alerjen in alerjenler)
-            )]
-        else:
-            alerjen_filtreli_df = df
+        with metrikler.asama('alerjen_filtresi'):
+            uygun = self.alerjen_filtresi(kahveci_adi, alerjenler, anlik)
+            adaylar = np.flatnonzero(uygun)
         
-        if len(alerjen_filtreli_df) == 0:
+        if len(adaylar) == 0:
             return {
                 'hata': 'Seçtiğiniz alerjilere uygun kahve bulunamadı!',
                 'alerjenler': [self.alerjen_listesi.get(a, a) for a in alerjenler] if alerjenler else []
             }
         
-        # Tercih puanlaması
-        scored_coffees = []
-        for index, kahve in alerjen_filtreli_df.iterrows():
-            kahve_dict = kahve.to_dict()
-            
-            # Puan hesapla
-            score = 0
-            matched_preferences = []
+        # Tercih puanlaması (tüm adaylar için dizi işlemleriyle)
+        with metrikler.asama('geleneksel_puanlama'):
+            coffee_matrix = self.kahveci_ozellik_matrisi(kahveci_adi, anlik)[uygun]
+            tercih_sayilari = np.array([tercihler.count(ozellik) for ozellik in self.OZELLIK_TURLERI], dtype=float)
             
             # Tercih eşleşmesi
-            for tercih in tercihler:
-                if tercih in kahve['ozellikler']:
-                    score += 1
-                    matched_preferences.append(tercih)
+            scores = coffee_matrix[:, :len(self.OZELLIK_TURLERI)] @ tercih_sayilari
             
             # Fiyat bonusu
-            if kahve['fiyat'] < 25:
-                score += 0.5
+            scores += np.where(katalog.fiyat[adaylar] < 25, 0.5, 0.0)
             
             # Alerjen penalty (az alerjen = bonus)
-            if len(kahve['alerjenler']) == 0:
-                score += 0.3
-            elif len(kahve['alerjenler']) <= 1:
-                score += 0.1
-            
-            # Rastgele faktör (çeşitlilik için)
-            score += random.random() * 0.3
+            alerjen_sayisi = coffee_matrix[:, 9]
+            scores += np.where(alerjen_sayisi == 0, 0.3, np.where(alerjen_sayisi <= 1, 0.1, 0.0))
             
-            # Ekstra bilgiler
-            kahve_dict['score'] = score
-            kahve_dict['matched_preferences'] = matched_preferences
-            kahve_dict['method'] = 'traditional'
-            
-            # Alerjen isimlerini ekle
-            if kahve_dict['alerjenler']:
-                kahve_dict['alerjen_isimleri'] = [
-                    self.alerjen_listesi.get(alerjen, alerjen) 
-                    for alerjen in kahve_dict['alerjenler']
-                ]
-            else:
-                kahve_dict['alerjen_isimleri'] = []
-            
-            scored_coffees.append(kahve_dict)
+            # Rastgele faktör (çeşitlilik için); sorguya bağlı: aynı sorgu aynı sonucu verir
+            rng = np.random.default_rng(self.sorgu_tohumu(
+                self.sorgu_anahtari(kahveci_adi, tercihler, alerjenler, max_oneri)
+            ))
+            scores += rng.random(len(scores)) * 0.3
         
-        # Puana göre sırala
-        scored_coffees.sort(key=lambda x: x['score'], reverse=True)
-        
-        # En iyi önerileri al
-        top_recommendations = []
-        for i, kahve in enumerate(scored_coffees[:max_oneri]):
-            kahve['rank'] = i + 1
-            kahve['confidence'] = min(100, kahve['score'] * 30)  # Basit güven skoru
-            
-            # Gerekçe oluştur
-            reasons = []
-            if kahve['rank'] == 1:
-                reasons.append("En iyi eşleşme")
-            elif kahve['rank'] <= 3:
-                reasons.append(f"{kahve['rank']}. en iyi seçenek")
-            
-            if kahve['matched_preferences']:
-                reasons.append(f"Tercihleriniz ile uyumlu: {', '.join(kahve['matched_preferences'])}")
-            
-            if kahve['fiyat'] < 25:
-                reasons.append("Ekonomik seçenek")
-            
-            if not kahve['alerjenler']:
-                reasons.append("Alerjen içermiyor")
-            
-            kahve['recommendation_reason'] = " • ".join(reasons) if reasons else "Size özel seçim"
-            
-            top_recommendations.append(kahve)
+        # En iyi önerileri al (yalnızca seçilen k kahve sözlüğe dönüştürülür)
+        with metrikler.asama('siralama'):
+            secilenler = self.en_iyi_k_sec(scores, max_oneri)
+        with metrikler.asama('sonuc_olusturma'):
+            top_recommendations = [
+                self.geleneksel_oneri_ogesi(katalog.kayit(adaylar[pos]), float(scores[pos]), i + 1, tercihler)
+                for i, pos in enumerate(secilenler)
+            ]
         
         return {
             'oneriler': top_recommendations,
             'toplam_oneri': len(top_recommendations),
-            'filtrelenen_urun_sayisi': len(alerjen_filtreli_df),
-            'toplam_urun_sayisi': len(df)
+            'filtrelenen_urun_sayisi': len(adaylar),
+            'toplam_urun_sayisi': len(katalog)
         }
     
+    def geleneksel_oneri_ogesi(self, kayit, score, rank, tercihler):
+        """Seçilen kahve kaydını geleneksel öneri sözlüğüne dönüştür"""
+        kahve = kayit.to_dict()
+        kahve['score'] = score
+        kahve['matched_preferences'] = [t for t in tercihler if t in kahve['ozellikler']]
+        kahve['method'] = 'traditional'
+        
+        # Alerjen isimlerini ekle
+        if kahve['alerjenler']:
+            kahve['alerjen_isimleri'] = [
+                self.alerjen_listesi.get(alerjen, alerjen) 
+                for alerjen in kahve['alerjenler']
+            ]
+        else:
+            kahve['alerjen_isimleri'] = []
+        
+        kahve['rank'] = rank
+        kahve['confidence'] = min(100, kahve['score'] * 30)  # Basit güven skoru
+        
+        # Gerekçe oluştur
+        reasons = []
+        if kahve['rank'] == 1:
+            reasons.append("En iyi eşleşme")
+        elif kahve['rank'] <= 3:
+            reasons.append(f"{kahve['rank']}. en iyi seçenek")
+        
+        if kahve['matched_preferences']:
+            reasons.append(f"Tercihleriniz ile uyumlu: {', '.join(kahve['matched_preferences'])}")
+        
+        if kahve['fiyat'] is not None and kahve['fiyat'] < 25:
+            reasons.append("Ekonomik seçenek")
+        
+        if not kahve['alerjenler']:
+            reasons.append("Alerjen içermiyor")
+        
+        kahve['recommendation_reason'] = " • ".join(reasons) if reasons else "Size özel seçim"
+        
+        return kahve
+    
     def kullanici_tercihi_kaydet(self, tercihler, alerjenler, secilen_kahve):
         """Kullanıcı tercihlerini gelecek öneriler için kaydet"""
-        self.user_preferences_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'tercihler': tercihler,
-            'alerjenler': alerjenler or [],
-            'secilen_kahve': secilen_kahve['kahve_adi'],
-            'kahveci': secilen_kahve['kahveci'],
-            'fiyat': secilen_kahve['fiyat'],
-            'ai_confidence': secilen_kahve.get('ai_confidence', 0)
-        })
-        
-        # Sadece son 100 kaydı tut
-        if len(self.user_preferences_history) > 100:
-            self.user_preferences_history = self.user_preferences_history[-100:]
+        # CSV modunda sadece son 100 kayıt bellekte tutulur; SQLite modunda kalıcıdır
+        try:
+            self.depolama.tercih_ekle({
+                'timestamp': datetime.now().isoformat(),
+                'tercihler': tercihler,
+                'alerjenler': alerjenler or [],
+                'secilen_kahve': secilen_kahve['kahve_adi'],
+                'kahveci': secilen_kahve['kahveci'],
+                'fiyat': secilen_kahve['fiyat'],
+                'ai_confidence': secilen_kahve.get('ai_confidence', 0)
+            })
+        except Exception as e:
+            print(f"Kullanıcı tercihi kaydedilirken hata: {e}")
     
-    def kahveci_listesi_al(self):
-        return list(self.kahveciler.keys())
+    def kahveci_listesi_al(self, anlik=None):
+        return list((anlik or self.anlik).kahveciler.keys())
     
     def alerjen_listesi_al(self):
         return self.alerjen_listesi
     
-    def kahveci_menusu_al(self, kahveci_adi, alerjenler=None):
-        if kahveci_adi not in self.kahveciler:
+    def kahveci_menusu_al(self, kahveci_adi, alerjenler=None, anlik=None):
+        anlik = anlik or self.anlik
+        if kahveci_adi not in anlik.kahveciler:
             return []
             
-        df = self.kahveciler[kahveci_adi]
+        katalog = anlik.kahveciler[kahveci_adi]
         
+        indeksler = None
         if alerjenler:
-            df = df[~df['alerjenler'].apply(lambda x: any(alerjen in x for alerjen in alerjenler))]
+            indeksler = np.flatnonzero(self.alerjen_filtresi(kahveci_adi, alerjenler, anlik))
         
-        menu_listesi = df.to_dict('records')
+        menu_listesi = [kayit.to_dict() for kayit in katalog.kayitlar(indeksler)]
         
         for item in menu_listesi:
             if item['alerjenler']:
@@ -550,19 +2833,31 @@ class AIKahveOnericiSistemi:
     
     def ai_istatistikler(self):
         """AI modeli istatistikleri"""
+        anlik = self.anlik
+        model = anlik.model
         stats = {
-            'model_active': self.model is not None,
-            'total_preferences_recorded': len(self.user_preferences_history),
+            'model_active': model is not None,
+            'model_ready': model is not None,
+            'egitim_durumu': self.egitim_durumu,
+            'son_egitim_zamani': self.son_egitim_zamani,
+            'onbellek': self.sonuc_onbellegi.istatistikler(),
+            'json_onbellegi': self.json_onbellegi.istatistikler(),
+            'total_preferences_recorded': self.depolama.tercih_sayisi(),
             'feature_count': len(self.feature_columns),
-            'label_encoders': list(self.label_encoders.keys()),
-            'recent_recommendations': self.user_preferences_history[-5:] if self.user_preferences_history else []
+            'label_encoders': list(anlik.label_encoders.keys()),
+            'menu_surumu': anlik.surum,
+            'model_surumleri': self.model_surum_bilgileri(),
+            'ogrenilen_feedback': self.ogrenilen_feedback,
+            'egitim_ayarlari': self.egitim_ayarlari,
+            'son_egitim_raporu': self.son_egitim_raporu,
+            'recent_recommendations': self.depolama.son_tercihler(5)
         }
         
-        if self.model:
+        if model:
             try:
                 # Feature importance
                 feature_names = ['user_' + f for f in ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']] + self.feature_columns
-                importances = self.model.feature_importances_
+                importances = model.feature_importances_
                 stats['feature_importance'] = dict(zip(feature_names, importances.tolist()))
             except:
                 stats['feature_importance'] = {}
@@ -572,23 +2867,31 @@ class AIKahveOnericiSistemi:
     def gunun_kahvesi_sec(self):
         """Günün kahvesini seç"""
         try:
-            # Tüm kahveleri birleştir
-            tum_kahveler = []
-            for kahveci, df in self.kahveciler.items():
-                for _, kahve in df.iterrows():
-                    kahve_dict = kahve.to_dict()
-                    kahve_dict['kahveci'] = kahveci
-                    tum_kahveler.append(kahve_dict)
-            
-            if not tum_kahveler:
+            anlik = self.anlik
+            bugun = datetime.now().date()
+            
+            # Seçim gün ve menü sürümü başına bir kez yapılır; model yayınları seçimi geçersiz kılmaz
+            onbellek = self._gunun_kahvesi
+            if onbellek is not None and onbellek[0] == (bugun, anlik.menu_surumu):
+                return dict(onbellek[1])
+            
+            # Kahveler satır satır kopyalanmaz; yalnızca seçilen kayıt sözlüğe çevrilir
+            kataloglar = list(anlik.kahveciler.values())
+            toplam = sum(len(katalog) for katalog in kataloglar)
+            
+            if not toplam:
                 return None
             
-            # Günün tarihini seed olarak kullan
-            bugun = datetime.now().date()
-            random.seed(bugun.toordinal())
+            # Günün tarihiyle tohumlanan ayrı bir üreteç: genel random durumu değişmez
+            rastgele = random.Random(bugun.toordinal())
             
-            # Rastgele bir kahve seç
-            secilen_kahve = random.choice(tum_kahveler)
+            # Rastgele bir kahve seç (tüm kahveler listesindeki sıra ile aynı)
+            sira = rastgele.choice(range(toplam))
+            for katalog in kataloglar:
+                if sira < len(katalog):
+                    secilen_kahve = katalog.kayit(sira).to_dict()
+                    break
+                sira -= len(katalog)
             
             # Alerjen isimlerini ekle
             if secilen_kahve['alerjenler']:
@@ -599,7 +2902,8 @@ class AIKahveOnericiSistemi:
             else:
                 secilen_kahve['alerjen_isimleri'] = []
             
-            return secilen_kahve
+            self._gunun_kahvesi = ((bugun, anlik.menu_surumu), secilen_kahve)
+            return dict(secilen_kahve)
             
         except Exception as e:
             print(f"Günün kahvesi seçilirken hata: {e}")
@@ -608,17 +2912,14 @@ class AIKahveOnericiSistemi:
     def feedback_kaydet(self, kahve_adi, kahveci, tercihler, alerjenler, begeni_puani, yorum):
         """Kahve önerisi geri bildirimini kaydet"""
         try:
-            # CSV dosyası yoksa oluştur
-            if not os.path.exists(self.feedback_file):
-                with open(self.feedback_file, 'w', encoding='utf-8') as f:
-                    f.write('timestamp,kahve_adi,kahveci,tercihler,alerjenler,beğeni_puanı,yorum\n')
-            
-            # Yeni feedback'i ekle
-            with open(self.feedback_file, 'a', encoding='utf-8') as f:
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                tercihler_str = ','.join(tercihler) if tercihler else ''
-                alerjenler_str = ','.join(alerjenler) if alerjenler else ''
-                f.write(f'{timestamp},{kahve_adi},{kahveci},"{tercihler_str}","{alerjenler_str}",{begeni_puani},"{yorum}"\n')
+            # Kayıt seçilen depolamaya yazılır (CSV modunda kuyruğa alınır)
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            tercihler_str = ','.join(tercihler) if tercihler else ''
+            alerjenler_str = ','.join(alerjenler) if alerjenler else ''
+            self.depolama.feedback_ekle(dict(zip(
+                GeriBildirimYazici.BASLIK,
+                [timestamp, kahve_adi, kahveci, tercihler_str, alerjenler_str, begeni_puani, yorum]
+            )))
             
             return True
             
@@ -629,40 +2930,7 @@ class AIKahveOnericiSistemi:
     def feedback_istatistikleri(self):
         """Feedback istatistiklerini getir"""
         try:
-            if not os.path.exists(self.feedback_file):
-                return {
-                    'toplam_feedback': 0,
-                    'ortalama_puan': 0,
-                    'en_cok_begenilen': None,
-                    'son_feedbackler': []
-                }
-            
-            df = pd.read_csv(self.feedback_file)
-            
-            if len(df) == 0:
-                return {
-                    'toplam_feedback': 0,
-                    'ortalama_puan': 0,
-                    'en_cok_begenilen': None,
-                    'son_feedbackler': []
-                }
-            
-            # En çok beğenilen kahve
-            en_cok_begenilen = df.loc[df['beğeni_puanı'].idxmax()]
-            
-            # Son 5 feedback
-            son_feedbackler = df.tail(5).to_dict('records')
-            
-            return {
-                'toplam_feedback': len(df),
-                'ortalama_puan': round(df['beğeni_puanı'].mean(), 2),
-                'en_cok_begenilen': {
-                    'kahve_adi': en_cok_begenilen['kahve_adi'],
-                    'kahveci': en_cok_begenilen['kahveci'],
-                    'puan': en_cok_begenilen['beğeni_puanı']
-                },
-                'son_feedbackler': son_feedbackler
-            }
+            return self.depolama.feedback_istatistikleri()
             
         except Exception as e:
             print(f"Feedback istatistikleri alınırken hata: {e}")
@@ -673,8 +2941,52 @@ class AIKahveOnericiSistemi:
                 'son_feedbackler': []
             }
 
+    def kahve_feedback_istatistigi(self, kahveci, kahve_adi):
+        """Tek bir kahvenin geri bildirim adedi ve ortalama puanı"""
+        try:
+            istatistik = self.depolama.kahve_istatistigi(kahveci, kahve_adi)
+        except Exception as e:
+            print(f"Kahve istatistiği alınırken hata: {e}")
+            istatistik = {'adet': 0, 'ortalama_puan': 0}
+        return dict(istatistik, kahveci=kahveci, kahve_adi=kahve_adi)
+
 # Global AI kahve önerici sistemi
-ai_kahve_sistemi = AIKahveOnericiSistemi()
+# KAHVE_EGITIM_MODU=arka_plan ile uygulama model eğitimini beklemeden trafik almaya başlar,
+# KAHVE_EGITIM_MODU=kapali ile yalnızca egit.py'nin yazdığı kayıtlı model kullanılır
+# KAHVE_METRIKLER=1 ise aşama/istek süreleri toplanır ve /metrics üzerinden sunulur
+metrikler = Metrikler(etkin=os.environ.get('KAHVE_METRIKLER', '0') == '1')
+# /metrics yalnızca KAHVE_METRIK_ANAHTARI tanımlıysa ve istek bu anahtarı 'Authorization: Bearer'
+# başlığında taşıyorsa açılır; ters vekil arkasında istemci adresine güvenilemez
+METRIK_ANAHTARI = os.environ.get('KAHVE_METRIK_ANAHTARI', '')
+
+ai_kahve_sistemi = AIKahveOnericiSistemi(
+    egitim_modu=os.environ.get('KAHVE_EGITIM_MODU', 'senkron'),
+    onbellek_boyutu=int(os.environ.get('KAHVE_ONBELLEK_BOYUTU', 1024)),
+    onbellek_ttl=float(os.environ.get('KAHVE_ONBELLEK_TTL', 300)),
+    # 0 ise menü dosyaları izlenmez; >0 ise bu kadar saniyede bir değişiklik kontrol edilir
+    menu_kontrol_araligi=float(os.environ.get('KAHVE_MENU_KONTROL_ARALIGI', 0)),
+    # 0 ise her geri bildirim istek içinde yazılır; fsync=1 her toplu yazımı diske zorlar
+    feedback_yazma_araligi=float(os.environ.get('KAHVE_FEEDBACK_YAZMA_ARALIGI', 1.0)),
+    feedback_kuyruk_boyutu=int(os.environ.get('KAHVE_FEEDBACK_KUYRUK_BOYUTU', 10000)),
+    feedback_fsync=os.environ.get('KAHVE_FEEDBACK_FSYNC', '0') == '1',
+    # sqlite: tüm işçiler aynı veritabanını paylaşır (ilk açılışta mevcut CSV içe aktarılır)
+    depolama=os.environ.get('KAHVE_DEPOLAMA', 'csv'),
+    veritabani_dosyasi=os.environ.get('KAHVE_VERITABANI', 'kahve_veri.db'),
+    # >0 ise yeni geri bildirimler bu kadar saniyede bir modele eklenir
+    ogrenme_araligi=float(os.environ.get('KAHVE_OGRENME_ARALIGI', 0)),
+    json_onbellek_boyutu=int(os.environ.get('KAHVE_JSON_ONBELLEK_BOYUTU', 512)),
+    # Derlenmiş menü kataloğu dizini; boş bırakılırsa her açılışta CSV ayrıştırılır
+    katalog_onbellegi=os.environ.get('KAHVE_KATALOG_ONBELLEGI', 'kahve_katalog_onbellegi'),
+    metrikler=metrikler,
+    # Eğitim ayarları; maks. derinlik 0 ise sınırsız
+    egitim_ayarlari={
+        'agac_sayisi': int(os.environ.get('KAHVE_AGAC_SAYISI', 100)),
+        'maks_derinlik': int(os.environ.get('KAHVE_MAKS_DERINLIK', 10)) or None,
+        'is_sayisi': int(os.environ.get('KAHVE_EGITIM_IS_SAYISI', -1)),
+        'oob': os.environ.get('KAHVE_EGITIM_OOB', '1') == '1',
+        'profil_sayisi': int(os.environ.get('KAHVE_EGITIM_PROFIL_SAYISI', 0)) or None
+    }
+)
 
 @app.route('/')
 def ana_sayfa():
@@ -692,27 +3004,170 @@ def ana_sayfa():
         '''
     return render_template('index.html')
 
+if metrikler.etkin:
+    # Kapalıyken istek yoluna hiç kanca eklenmez
+    @app.before_request
+    def istek_zamanlayicisini_baslat():
+        g.istek_baslangici = time.perf_counter()
+
+    @app.after_request
+    def istek_suresini_kaydet(yanit):
+        baslangic = g.pop('istek_baslangici', None)
+        if baslangic is not None:
+            # Yol şablonu kullanılır (/menu/<kahveci_adi>); etiket sayısı sınırlı kalır
+            endpoint = request.url_rule.rule if request.url_rule else 'eslesmeyen'
+            metrikler.gozlemle(
+                'kahve_istek_suresi_saniye', time.perf_counter() - baslangic,
+                endpoint=endpoint, metod=request.method
+            )
+            metrikler.say('kahve_istek_toplam', endpoint=endpoint, metod=request.method, kod=yanit.status_code)
+        return yanit
+
+# KAHVE_PROFIL_ANAHTARI tanımlıysa bu anahtarı 'X-Kahve-Profil' başlığında veya ?profil=
+# parametresinde gönderen istekler cProfile ile profillenir
+PROFIL_ANAHTARI = os.environ.get('KAHVE_PROFIL_ANAHTARI', '')
+profil_deposu = ProfilDeposu(
+    os.environ.get('KAHVE_PROFIL_DIZINI', 'kahve_profilleri'),
+    int(os.environ.get('KAHVE_PROFIL_SAYISI', 50))
+)
+# Aynı anda tek istek profillenir (Python 3.12+ tek profilleyiciye izin verir)
+_profil_kilidi = threading.Lock()
+
+def profil_yetkili():
+    """İstek doğru profil anahtarını taşıyor mu"""
+    if not PROFIL_ANAHTARI:
+        return False
+    anahtar = request.headers.get('X-Kahve-Profil') or request.args.get('profil') or ''
+    return hmac.compare_digest(anahtar.encode('utf-8'), PROFIL_ANAHTARI.encode('utf-8'))
+
+# Model geri alma gibi yönetim uçları yalnızca KAHVE_YONETIM_ANAHTARI tanımlıysa ve istek bu
+# anahtarı 'X-Kahve-Yonetim' başlığında taşıyorsa çalışır
+YONETIM_ANAHTARI = os.environ.get('KAHVE_YONETIM_ANAHTARI', '')
+
+def yonetim_yetkili():
+    """İstek doğru yönetim anahtarını taşıyor mu"""
+    anahtar = request.headers.get('X-Kahve-Yonetim') or ''
+    return hmac.compare_digest(anahtar.encode('utf-8'), YONETIM_ANAHTARI.encode('utf-8'))
+
+def metrik_yetkili():
+    """İstek doğru metrik anahtarını taşıyor mu"""
+    yetki = request.headers.get('Authorization') or ''
+    anahtar = yetki[len('Bearer '):] if yetki.startswith('Bearer ') else ''
+    return hmac.compare_digest(anahtar.encode('utf-8'), METRIK_ANAHTARI.encode('utf-8'))
+
+if PROFIL_ANAHTARI:
+    @app.before_request
+    def profili_baslat():
+        # Eşleşmeyen yollar ve profil uçlarının kendisi profillenmez
+        if request.url_rule is None or request.endpoint in ('profil_listesi', 'profil_dosyasi'):
+            return
+        if not profil_yetkili():
+            return
+        if not _profil_kilidi.acquire(blocking=False):
+            g.profil_durumu = 'mesgul'
+            return
+        g.profil = cProfile.Profile()
+        g.profil.enable()
+
+    @app.after_request
+    def profili_kaydet(yanit):
+        profil = g.pop('profil', None)
+        if profil is not None:
+            profil.disable()
+            _profil_kilidi.release()
+            etiket = f"{request.method}-{request.url_rule.rule}"
+            # Profil yazılamasa da (disk dolu, izin yok) isteğin kendi yanıtı bozulmaz
+            try:
+                yanit.headers['X-Kahve-Profil-Dosyasi'] = profil_deposu.kaydet(profil, etiket)
+            except Exception as e:
+                print(f"Profil kaydedilirken hata: {e}")
+                yanit.headers['X-Kahve-Profil-Dosyasi'] = 'hata'
+        elif g.pop('profil_durumu', None):
+            yanit.headers['X-Kahve-Profil-Dosyasi'] = 'mesgul'
+        return yanit
+
+    @app.teardown_request
+    def profili_kapat(hata=None):
+        # after_request çalışmadan biten isteklerde (işlenmeyen hata) profilleyici bırakılır
+        profil = g.pop('profil', None)
+        if profil is not None:
+            profil.disable()
+            _profil_kilidi.release()
+
+# Menüye bağlı yanıtlar için tarayıcı önbellek süresi (0: her seferinde ETag ile doğrulanır)
+JSON_MAX_AGE = int(os.environ.get('KAHVE_JSON_MAX_AGE', 0))
+
+def hazir_json_yaniti(anahtar, uretici):
+    """Menü sürümü başına bir kez JSON'a çevrilen yanıtı ETag ve 304 desteğiyle döndür"""
+    # Üretici, anahtardaki sürümle aynı görüntüyü kullanır
+    anlik = ai_kahve_sistemi.anlik
+    anahtar = (anlik.menu_surumu,) + anahtar
+    kayit = ai_kahve_sistemi.json_onbellegi.al(anahtar)
+    if kayit is None:
+        govde = app.json.response(uretici(anlik)).get_data()
+        # İçerikten türetilen güçlü ETag: aynı menüyü sunan tüm işçilerde aynıdır
+        kayit = (govde, hashlib.sha256(govde).hexdigest()[:32])
+        ai_kahve_sistemi.json_onbellegi.koy(anahtar, kayit)
+    
+    govde, etag = kayit
+    yanit = app.response_class(govde, mimetype=app.json.mimetype)
+    yanit.set_etag(etag)
+    yanit.cache_control.public = True
+    yanit.cache_control.max_age = JSON_MAX_AGE
+    if JSON_MAX_AGE == 0:
+        yanit.cache_control.must_revalidate = True
+    # If-None-Match eşleşirse gövdesiz 304 döner
+    return yanit.make_conditional(request)
+
 @app.route('/kahveciler')
 def kahveciler():
-    return jsonify(ai_kahve_sistemi.kahveci_listesi_al())
+    return hazir_json_yaniti(('kahveciler',), ai_kahve_sistemi.kahveci_listesi_al)
 
 @app.route('/alerjenler')
 def alerjenler():
-    return jsonify(ai_kahve_sistemi.alerjen_listesi_al())
+    return hazir_json_yaniti(('alerjenler',), lambda anlik: ai_kahve_sistemi.alerjen_listesi_al())
 
 @app.route('/kahveci-alerjenleri/<kahveci_adi>')
 def kahveci_alerjenleri(kahveci_adi):
     """Belirli kahvecinin menüsündeki alerjenleri getir"""
-    alerjenler = ai_kahve_sistemi.kahveci_alerjenleri_al(kahveci_adi)
-    return jsonify(alerjenler)
+    return hazir_json_yaniti(
+        ('kahveci-alerjenleri', kahveci_adi),
+        lambda anlik: ai_kahve_sistemi.kahveci_alerjenleri_al(kahveci_adi, anlik)
+    )
 
 @app.route('/menu/<kahveci_adi>')
 def kahveci_menusu(kahveci_adi):
     alerjenler = request.args.get('alerjenler', '').split(',') if request.args.get('alerjenler') else None
     if alerjenler and alerjenler[0] == '':
         alerjenler = None
-    menu = ai_kahve_sistemi.kahveci_menusu_al(kahveci_adi, alerjenler)
-    return jsonify(menu)
+    # Filtre sırası ve tekrarları sonucu değiştirmez; aynı önbellek kaydını kullanır
+    filtre = tuple(sorted(set(alerjenler))) if alerjenler else ()
+    return hazir_json_yaniti(
+        ('menu', kahveci_adi, filtre),
+        lambda anlik: ai_kahve_sistemi.kahveci_menusu_al(kahveci_adi, list(filtre) or None, anlik)
+    )
+
+@app.route('/benzer/<kahveci_adi>/<kahve_adi>')
+def benzer_kahveler(kahveci_adi, kahve_adi):
+    """Bir kahveye benzer kahveler; ?kapsam=tumu tüm kahvecilerde arar"""
+    alerjenler = request.args.get('alerjenler', '').split(',') if request.args.get('alerjenler') else None
+    filtre = tuple(sorted(set(alerjenler))) if alerjenler else ()
+    max_oneri = min(request.args.get('max_oneri', 5, type=int), ai_kahve_sistemi.BENZER_KOMSU_SAYISI)
+    kapsam = request.args.get('kapsam', 'kahveci')
+    if kapsam not in ('kahveci', ai_kahve_sistemi.TUM_KAHVECILER):
+        return jsonify({'hata': f"Geçersiz kapsam! ('kahveci' veya '{ai_kahve_sistemi.TUM_KAHVECILER}')"}), 400
+    
+    # Bilinmeyen kahveci/kahve önbelleğe girmez
+    sonuc = ai_kahve_sistemi.benzer_kahveler(kahveci_adi, kahve_adi, list(filtre) or None, 0, kapsam)
+    if 'hata' in sonuc:
+        return jsonify(sonuc), 404
+    
+    return hazir_json_yaniti(
+        ('benzer', kahveci_adi, kahve_adi, filtre, max_oneri, kapsam),
+        lambda anlik: ai_kahve_sistemi.benzer_kahveler(
+            kahveci_adi, kahve_adi, list(filtre) or None, max_oneri, kapsam, anlik
+        )
+    )
 
 @app.route('/coklu-ai-oneri', methods=['POST'])
 def coklu_ai_kahve_onerisi():
@@ -730,9 +3185,50 @@ def coklu_ai_kahve_onerisi():
         if not kahveci_adi:
             return jsonify({'hata': 'Kahveci seçilmedi!'}), 400
 
+        if not isinstance(kahveci_adi, str):
+            return jsonify({'hata': 'kahveci bir metin olmalıdır!'}), 400
+
         if not tercihler:
             return jsonify({'hata': 'En az bir tercih seçilmelidir!'}), 400
 
+        # Sorgu anahtarı sıralanıp hashlendiği için listeler yalnızca metin içerebilir
+        for alan, deger in (('tercihler', tercihler), ('alerjenler', alerjenler)):
+            if deger is not None and (not isinstance(deger, list)
+                                      or not all(isinstance(oge, str) for oge in deger)):
+                return jsonify({'hata': f'{alan} metinlerden oluşan bir liste olmalıdır!'}), 400
+
+        if not isinstance(max_oneri, int) or isinstance(max_oneri, bool) or max_oneri < 1:
+            return jsonify({'hata': 'max_oneri pozitif bir tam sayı olmalıdır!'}), 400
+
+        # Tüm kahvecilerin birleşik kataloğunda tek sıralama
+        if kahveci_adi == ai_kahve_sistemi.TUM_KAHVECILER:
+            kahveciler = veri.get('kahveciler')
+            if kahveciler is not None and (not isinstance(kahveciler, list)
+                                           or not all(isinstance(ad, str) for ad in kahveciler)):
+                return jsonify({'hata': 'kahveciler kahveci adlarından oluşan bir liste olmalıdır!'}), 400
+
+            kahveci_kotasi = veri.get('kahveci_kotasi')
+            def gecerli_kota(kota):
+                return isinstance(kota, int) and not isinstance(kota, bool) and kota >= 0
+            if kahveci_kotasi is not None and not (
+                gecerli_kota(kahveci_kotasi) if not isinstance(kahveci_kotasi, dict)
+                else all(gecerli_kota(kota) for kota in kahveci_kotasi.values())
+            ):
+                return jsonify({
+                    'hata': 'kahveci_kotasi negatif olmayan bir tam sayı veya kahveci adı -> tam sayı sözlüğü olmalıdır!'
+                }), 400
+
+            oneriler = ai_kahve_sistemi.kahveciler_arasi_oneri(
+                tercihler=tercihler,
+                alerjenler=alerjenler,
+                max_oneri=max_oneri,
+                kahveciler=kahveciler,
+                kahveci_kotasi=kahveci_kotasi
+            )
+            if 'hata' in oneriler:
+                return jsonify(oneriler), 400
+            return jsonify(oneriler)
+
         # Kahveci kontrolü
         if kahveci_adi not in ai_kahve_sistemi.kahveciler:
             return jsonify({
@@ -762,6 +3258,93 @@ def coklu_ai_kahve_onerisi():
             'hata_detay': hata_detay
         }), 500
 
+@app.route('/toplu-ai-oneri', methods=['POST'])
+def toplu_ai_kahve_onerisi():
+    """Birden çok öneri sorgusunu tek istekte yanıtlayan endpoint"""
+    try:
+        veri = request.get_json()
+        if not veri:
+            return jsonify({'hata': 'JSON verisi bulunamadı!'}), 400
+
+        sorgular = veri.get('sorgular')
+        if not isinstance(sorgular, list) or not sorgular:
+            return jsonify({'hata': 'En az bir sorgu gönderilmelidir!'}), 400
+
+        if len(sorgular) > ai_kahve_sistemi.TOPLU_SORGU_SINIRI:
+            return jsonify({
+                'hata': f'Tek istekte en fazla {ai_kahve_sistemi.TOPLU_SORGU_SINIRI} sorgu gönderilebilir!'
+            }), 400
+
+        # Sorgu hataları toplu isteği bozmaz; ilgili sonucun içinde döner
+        return jsonify(ai_kahve_sistemi.toplu_ai_kahve_onerisi(sorgular))
+
+    except Exception as e:
+        import traceback
+        hata_detay = traceback.format_exc()
+        print(f"Hata detayı: {hata_detay}")
+        return jsonify({
+            'hata': f'Toplu öneri oluşturulurken hata: {str(e)}',
+            'hata_detay': hata_detay
+        }), 500
+
+@app.route('/metrics')
+def metrik_ciktisi():
+    """Prometheus metin biçiminde metrikler (metrik anahtarı gerekir)"""
+    if not metrikler.etkin or not METRIK_ANAHTARI:
+        return jsonify({
+            'hata': 'Metrikler kapalı (KAHVE_METRIKLER=1 ve KAHVE_METRIK_ANAHTARI ile açılır)'
+        }), 404
+    if not metrik_yetkili():
+        return jsonify({'hata': 'Geçersiz metrik anahtarı!'}), 403
+    return app.response_class(metrikler.metin(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/profiller')
+def profil_listesi():
+    """Kaydedilmiş istek profilleri (profil anahtarı gerekir)"""
+    if not profil_yetkili():
+        return jsonify({'hata': 'Profil erişimi kapalı veya anahtar geçersiz!'}), 404
+    return jsonify({'profiller': profil_deposu.listele(), 'maks_dosya': profil_deposu.maks_dosya})
+
+@app.route('/profiller/<ad>')
+def profil_dosyasi(ad):
+    """Profil dosyasını indir (.prof, pstats/snakeviz ile açılır); ?ozet=1 metin özeti döndürür"""
+    if not profil_yetkili():
+        return jsonify({'hata': 'Profil erişimi kapalı veya anahtar geçersiz!'}), 404
+    yol = profil_deposu.yol(ad)
+    if yol is None:
+        return jsonify({'hata': 'Profil bulunamadı!'}), 404
+    if request.args.get('ozet') == '1':
+        return app.response_class(profil_deposu.ozet(ad), content_type='text/plain; charset=utf-8')
+    return send_file(yol, mimetype='application/octet-stream', as_attachment=True, download_name=ad)
+
+@app.route('/ai-istatistikleri')
+def ai_istatistikleri():
+    """AI modeli istatistikleri ve hazır olma durumu"""
+    return jsonify(ai_kahve_sistemi.ai_istatistikler())
+
+@app.route('/model-geri-al', methods=['POST'])
+def model_geri_al():
+    """Yayındaki modeli bir önceki sürüme döndür (yönetim anahtarı gerekir)
+
+    Sürüm geçmişi işçiye özeldir; geri alma yalnızca isteği karşılayan işçide geçerlidir.
+    """
+    if not YONETIM_ANAHTARI:
+        return jsonify({'hata': 'Yönetim uçları kapalı (KAHVE_YONETIM_ANAHTARI ile açılır)'}), 404
+    if not yonetim_yetkili():
+        return jsonify({'hata': 'Geçersiz yönetim anahtarı!'}), 403
+
+    surum = ai_kahve_sistemi.model_geri_al()
+    if surum is None:
+        return jsonify({
+            'hata': 'Geri alınacak önceki model sürümü yok!',
+            'model_surumleri': ai_kahve_sistemi.model_surum_bilgileri()
+        }), 409
+    return jsonify({
+        'mesaj': f'Model {surum} numaralı sürüme geri alındı',
+        'surum': surum,
+        'model_surumleri': ai_kahve_sistemi.model_surum_bilgileri()
+    })
+
 @app.route('/gunun-kahvesi')
 def gunun_kahvesi():
     """Günün kahvesini getir"""
@@ -810,5 +3393,10 @@ def feedback_istatistikleri():
     istatistikler = ai_kahve_sistemi.feedback_istatistikleri()
     return jsonify(istatistikler)
 
+@app.route('/feedback-istatistikleri/<kahveci_adi>/<kahve_adi>')
+def kahve_feedback_istatistigi(kahveci_adi, kahve_adi):
+    """Tek bir kahvenin geri bildirim istatistiği"""
+    return jsonify(ai_kahve_sistemi.kahve_feedback_istatistigi(kahveci_adi, kahve_adi))
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,279 @@
+"""Sentetik büyük menü ve geri bildirim verisiyle kahve öneri sisteminin mikro kıyaslaması
+
+Örnek:
+    python benchmark.py --olcekler 1000,10000 --cikti sonuc.json
+    python benchmark.py --olcekler 50000 --egitim-maks-urun 0 --dizin /tmp/kahve-veri
+
+Her ölçekte tohumlu bir üreteçle dağıtılan şemada ('<Kahveci> Menü.csv') menüler ve
+kahve_feedback.csv yazılır; başlatma, eğitim, tekil/toplu öneri, filtreleme, benzer kahve
+ve istatistik süreleri ölçülür. Sonuç JSON olarak yazılır; iki commit'in çıktısı
+karşılaştırılarak gerilemeler görülebilir. Ağ veya GPU gerektirmez.
+
+Not: CSV'den ilk başlatmada benzer kahve indeksi ürün sayısıyla karesel sürede hesaplanır
+(derlenmiş katalogdan başlatmada diskten okunur); 100 bin ve üzeri ölçekler uzun sürebilir.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BUYUK_MENU_BAZLARI = ['Espresso', 'Kahve', 'Filtre Kahve', 'Cold Brew', 'Turkish Coffee',
+                      'Çikolata', 'Chai Çayı', 'Matcha Tozu', 'Meyve', 'Dondurma']
+BUYUK_MENU_EKLERI = ['Süt', 'Soğuk Süt', 'Soya Süt', 'Buz', 'Krema', 'Köpük', 'Su', 'Karamel Sos',
+                     'Çikolata Sos', 'Vanilya Şurup', 'Fındık Şurup', 'Badem Süt', 'Kurabiye']
+# Ek içerik -> menülerde yazılan alerjen adı
+EK_ALERJENLERI = {
+    'Süt': 'Süt', 'Soğuk Süt': 'Süt', 'Krema': 'Süt', 'Köpük': 'Süt', 'Dondurma': 'Süt',
+    'Soya Süt': 'Soya', 'Fındık Şurup': 'Sert Kabuklu Meyveler', 'Badem Süt': 'Sert Kabuklu Meyveler',
+    'Kurabiye': 'Gluten'
+}
+BOYUTLAR = ['Single', 'Single/Double', 'Small/Medium/Large', 'Tall/Grande/Venti', 'Standard/Medium/Large']
+TERCIHLER = ['guclu', 'hafif', 'sicak', 'soguk', 'tatli', 'sade']
+
+
+def menu_uret(rng, urun_sayisi, kahveci_sayisi):
+    """Dağıtılan menü şemasında (kahveci, ürün_adı, içerik, ...) sentetik menüler"""
+    menuler = {}
+    for k, adet in enumerate(np.array_split(np.arange(urun_sayisi), kahveci_sayisi)):
+        kahveci = f'Zincir {k + 1}'
+        n = len(adet)
+        bazlar = rng.integers(0, len(BUYUK_MENU_BAZLARI), n)
+        ek_sayilari = rng.integers(0, 4, n)
+        ekler = rng.integers(0, len(BUYUK_MENU_EKLERI), (n, 3))
+        boyutlar = rng.integers(0, len(BOYUTLAR), n)
+        satirlar = []
+        for i in range(n):
+            parcalar = [BUYUK_MENU_BAZLARI[bazlar[i]]]
+            parcalar += dict.fromkeys(BUYUK_MENU_EKLERI[e] for e in ekler[i, :ek_sayilari[i]])
+            alerjenler = list(dict.fromkeys(EK_ALERJENLERI[p] for p in parcalar if p in EK_ALERJENLERI))
+            satirlar.append((
+                kahveci,
+                f'{parcalar[0]} No {adet[i]}',
+                '+'.join(parcalar),
+                BOYUTLAR[boyutlar[i]],
+                ';'.join(alerjenler) or 'Yok',
+                ', '.join(p.lower() for p in parcalar)
+            ))
+        menuler[kahveci] = pd.DataFrame(satirlar, columns=[
+            'kahveci', 'ürün_adı', 'içerik', 'boyut_seçenekleri', 'alerjenler', 'içerik_listesi'
+        ])
+    return menuler
+
+
+def feedback_uret(rng, menuler, satir_sayisi):
+    """GeriBildirimYazici.BASLIK şemasında sentetik geri bildirim kaydı"""
+    tum = pd.concat(menuler.values(), ignore_index=True)
+    secilen = rng.integers(0, len(tum), satir_sayisi)
+    baslangic = np.datetime64('2025-01-01T00:00:00')
+    zamanlar = baslangic + rng.integers(0, 365 * 24 * 3600, satir_sayisi).astype('timedelta64[s]')
+    tercih_kombinasyonlari = [','.join(TERCIHLER[j] for j in range(6) if u >> j & 1) for u in range(1, 64)]
+    return pd.DataFrame({
+        'timestamp': np.char.replace(np.datetime_as_string(np.sort(zamanlar)), 'T', ' '),
+        'kahve_adi': tum['ürün_adı'].to_numpy()[secilen],
+        'kahveci': tum['kahveci'].to_numpy()[secilen],
+        'tercihler': np.array(tercih_kombinasyonlari)[rng.integers(0, 63, satir_sayisi)],
+        'alerjenler': np.array(['', 'sut', 'soya', 'gluten', 'sut,soya'])[rng.integers(0, 5, satir_sayisi)],
+        'beğeni_puanı': rng.integers(1, 6, satir_sayisi),
+        'yorum': ''
+    })
+
+
+def sorgular_uret(rng, kahveciler, sayi):
+    alerjen_secenekleri = [[], ['sut'], ['soya'], ['gluten'], ['sut', 'soya']]
+    return [{
+        'kahveci': kahveciler[rng.integers(0, len(kahveciler))],
+        'tercihler': [TERCIHLER[j] for j in rng.choice(6, rng.integers(1, 4), replace=False)],
+        'alerjenler': alerjen_secenekleri[rng.integers(0, len(alerjen_secenekleri))],
+        'max_oneri': 5
+    } for _ in range(sayi)]
+
+
+def ozetle(sureler):
+    """Saniye listesini milisaniye özetine çevir"""
+    ms = np.asarray(sureler) * 1000
+    return {
+        'tekrar': len(ms),
+        'ortalama_ms': round(float(ms.mean()), 4),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'min_ms': round(float(ms.min()), 4),
+        'toplam_ms': round(float(ms.sum()), 4)
+    }
+
+
+def olc(fonksiyon, girdiler, hazirlik=None):
+    """Her girdi için fonksiyonu ayrı ayrı zamanla (hazırlık süreye dahil değil)"""
+    sureler = []
+    for girdi in girdiler:
+        if hazirlik is not None:
+            hazirlik()
+        baslangic = time.perf_counter()
+        fonksiyon(girdi)
+        sureler.append(time.perf_counter() - baslangic)
+    return ozetle(sureler)
+
+
+def olcek_calistir(app, dizin, urun_sayisi, args):
+    """Tek bir ölçekte veriyi üret ve tüm ölçümleri yap"""
+    rng = np.random.default_rng(args.tohum)
+    os.makedirs(dizin)
+    os.chdir(dizin)
+    olcumler = {}
+
+    baslangic = time.perf_counter()
+    menuler = menu_uret(rng, urun_sayisi, args.kahveci_sayisi)
+    for kahveci, df in menuler.items():
+        df.to_csv(f'{kahveci} Menü.csv', index=False)
+    feedback_satiri = urun_sayisi * args.feedback_carpani
+    feedback_uret(rng, menuler, feedback_satiri).to_csv('kahve_feedback.csv', index=False)
+    veri_uretimi = time.perf_counter() - baslangic
+
+    def sistem_olustur():
+        # Eğitim ayrıca ölçülür; başlatma yalnızca menü/katalog ve geri bildirim özetini içerir
+        return app.AIKahveOnericiSistemi(
+            egitim_modu='kapali', egitim_ayarlari={'agac_sayisi': args.agac_sayisi, 'is_sayisi': args.is_sayisi}
+        )
+
+    sistemler = []
+    olcumler['baslatma_csv'] = olc(lambda _: sistemler.append(sistem_olustur()), [None])
+    olcumler['baslatma_derlenmis_katalog'] = olc(lambda _: sistemler.append(sistem_olustur()), [None])
+    sistem = sistemler[-1]
+    for eski in sistemler[:-1]:
+        eski.depolama.yazici.kapat()
+
+    egitim_raporu = None
+    if urun_sayisi <= args.egitim_maks_urun:
+        olcumler['egitim'] = olc(lambda _: sistem.model_egitimini_baslat(yeniden_egit=True), [None])
+        egitim_raporu = sistem.son_egitim_raporu
+
+    kahveciler = sistem.kahveci_listesi_al()
+    sorgular = sorgular_uret(rng, kahveciler, args.sorgu_sayisi)
+    temizle = sistem.sonuc_onbellegi.temizle
+
+    def tekil(sorgu):
+        sistem.coklu_ai_kahve_onerisi(sorgu['kahveci'], sorgu['tercihler'], sorgu['alerjenler'], sorgu['max_oneri'])
+
+    olcumler['tekil_oneri'] = olc(tekil, sorgular, hazirlik=temizle)
+    olcumler['tekil_oneri_onbellekten'] = olc(tekil, sorgular)
+    olcumler['toplu_oneri'] = olc(lambda s: sistem.toplu_ai_kahve_onerisi(s), [sorgular], hazirlik=temizle)
+    olcumler['toplu_oneri']['sorgu_sayisi'] = len(sorgular)
+    olcumler['kahveciler_arasi_oneri'] = olc(
+        lambda s: sistem.kahveciler_arasi_oneri(s['tercihler'], s['alerjenler'], s['max_oneri']),
+        sorgular[:args.tekrar], hazirlik=temizle
+    )
+    olcumler['menu_filtreleme'] = olc(
+        lambda s: sistem.kahveci_menusu_al(s['kahveci'], s['alerjenler'] or None), sorgular[:args.tekrar]
+    )
+    katalog = sistem.kahveciler[kahveciler[0]]
+    adlar = [katalog.kayit(i)['kahve_adi'] for i in rng.integers(0, len(katalog), args.tekrar)]
+    olcumler['benzer_kahveler'] = olc(
+        lambda ad: sistem.benzer_kahveler(kahveciler[0], ad, ['sut'], 5, 'tumu'), adlar
+    )
+
+    def feedback_yukle(_):
+        ozet = app.GeriBildirimOzeti()
+        ozet.dosyadan_yukle('kahve_feedback.csv')
+
+    olcumler['feedback_yukleme'] = olc(feedback_yukle, [None])
+    olcumler['feedback_istatistikleri'] = olc(lambda _: sistem.feedback_istatistikleri(), range(args.tekrar))
+    olcumler['ai_istatistikleri'] = olc(lambda _: sistem.ai_istatistikler(), range(args.tekrar))
+    sistem.depolama.yazici.kapat()
+
+    return {
+        'urun_sayisi': urun_sayisi,
+        'kahveci_sayisi': args.kahveci_sayisi,
+        'feedback_satiri': feedback_satiri,
+        'veri_uretimi_saniye': round(veri_uretimi, 3),
+        'model': sistem.model is not None,
+        'egitim_raporu': egitim_raporu,
+        'olcumler': olcumler
+    }
+
+
+def git_surumu():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sentetik verilerle kahve öneri sistemi kıyaslaması')
+    parser.add_argument('--olcekler', default='1000,10000', help='Virgülle ayrılmış toplam ürün sayıları')
+    parser.add_argument('--kahveci-sayisi', type=int, default=4, help='Ürünlerin dağıtılacağı kahveci sayısı')
+    parser.add_argument('--feedback-carpani', type=int, default=10, help='Ürün başına geri bildirim satırı')
+    parser.add_argument('--sorgu-sayisi', type=int, default=200, help='Tekil/toplu öneri sorgusu sayısı')
+    parser.add_argument('--tekrar', type=int, default=20, help='Diğer ölçümlerin tekrar sayısı')
+    parser.add_argument('--agac-sayisi', type=int, default=100, help='Eğitilen ormandaki ağaç sayısı')
+    parser.add_argument('--is-sayisi', type=int, default=-1, help='Eğitimde paralel iş sayısı')
+    parser.add_argument('--egitim-maks-urun', type=int, default=100000,
+                        help='Bu ürün sayısının üstünde eğitim atlanır (geleneksel yöntem ölçülür)')
+    parser.add_argument('--tohum', type=int, default=42, help='Veri ve sorgu üreteci tohumu')
+    parser.add_argument('--cikti', help='Sonuç JSON dosyası (verilmezse standart çıktı)')
+    parser.add_argument('--dizin', help='Üretilen verilerin yazılacağı dizin (verilmezse geçici, sonunda silinir)')
+    args = parser.parse_args()
+
+    olcekler = [int(olcek) for olcek in args.olcekler.split(',') if olcek]
+    cikti = os.path.abspath(args.cikti) if args.cikti else None
+    kok = os.path.abspath(args.dizin) if args.dizin else tempfile.mkdtemp(prefix='kahve-benchmark-')
+    os.makedirs(kok, exist_ok=True)
+
+    # app, içe aktarılırken boş bir dizinde eğitimsiz başlatılır; ölçümler kendi sistemlerini kurar
+    os.environ['KAHVE_EGITIM_MODU'] = 'kapali'
+    os.environ.pop('KAHVE_METRIKLER', None)
+    os.environ.pop('KAHVE_PROFIL_ANAHTARI', None)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    calisma_dizini = os.getcwd()
+    os.chdir(kok)
+    # Uygulama günlükleri stderr'e gider; standart çıktıda yalnızca JSON kalır
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            import app
+            import sklearn
+
+            sonuclar = []
+            for urun_sayisi in olcekler:
+                print(f'Ölçek: {urun_sayisi} ürün')
+                sonuclar.append(olcek_calistir(app, os.path.join(kok, f'olcek-{urun_sayisi}'), urun_sayisi, args))
+    finally:
+        os.chdir(calisma_dizini)
+        if not args.dizin:
+            shutil.rmtree(kok, ignore_errors=True)
+
+    rapor = {
+        'git': git_surumu(),
+        'zaman': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'ortam': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_sayisi': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__
+        },
+        'ayarlar': vars(args),
+        'sonuclar': sonuclar
+    }
+    metin = json.dumps(rapor, ensure_ascii=False, indent=2)
+    if cikti:
+        with open(cikti, 'w', encoding='utf-8') as f:
+            f.write(metin + '\n')
+    else:
+        print(metin)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""Kahve öneri modelini çevrimdışı eğitip model dosyasını yazan komut satırı işi
+
+Örnek:
+    python egit.py --agac-sayisi 300 --maks-derinlik 12 --is-sayisi -1
+
+Sunucular KAHVE_EGITIM_MODU=kapali ile başlatılırsa eğitim yapmaz, bu işin
+yazdığı kahve_model.pkl dosyasını yükler.
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kahve öneri modelini eğit ve kaydet')
+    parser.add_argument('--agac-sayisi', type=int, default=100, help='Ormandaki ağaç sayısı')
+    parser.add_argument('--maks-derinlik', type=int, default=10, help='Ağaç derinliği (0: sınırsız)')
+    parser.add_argument('--is-sayisi', type=int, default=-1, help='Paralel iş sayısı (-1: tüm çekirdekler)')
+    parser.add_argument('--profil-sayisi', type=int, default=0,
+                        help='Simüle edilecek kullanıcı profili sayısı (0: yalnızca temel profiller)')
+    parser.add_argument('--oob-yok', action='store_true', help='Torba dışı (OOB) hata hesaplanmasın')
+    args = parser.parse_args()
+
+    # Ayarlar app içe aktarılmadan önce verilir; içe aktarma sırasında eğitim yapılmaz
+    os.environ['KAHVE_EGITIM_MODU'] = 'kapali'
+    os.environ['KAHVE_AGAC_SAYISI'] = str(args.agac_sayisi)
+    os.environ['KAHVE_MAKS_DERINLIK'] = str(args.maks_derinlik)
+    os.environ['KAHVE_EGITIM_IS_SAYISI'] = str(args.is_sayisi)
+    os.environ['KAHVE_EGITIM_PROFIL_SAYISI'] = str(args.profil_sayisi)
+    os.environ['KAHVE_EGITIM_OOB'] = '0' if args.oob_yok else '1'
+
+    import app
+
+    sistem = app.ai_kahve_sistemi
+    # İçe aktarmada yüklenen eski model ve raporu başarı sayılmaz; yeni model kaydedilmiş olmalı
+    if not sistem.model_egitimini_baslat(yeniden_egit=True):
+        print('Model eğitilemedi', file=sys.stderr)
+        return 1
+
+    print(json.dumps(sistem.son_egitim_raporu, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# app.py depo kökünde; testler düz `pytest` ile de içe aktarabilsin
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+import csv
+import importlib
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    # app içe aktarılırken çalışma dizinindeki menülerle sistem kurar; boş bir dizinde eğitimsiz başlat
+    dizin = tmp_path_factory.mktemp('app')
+    # monkeypatch işlev kapsamlı; modül kapsamında ortam ve dizin bağlamla geri alınır
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('KAHVE_EGITIM_MODU', 'kapali')
+        mp.chdir(dizin)
+        return importlib.import_module('app')
+
+
+def test_satir_sonu_olmayan_dosyaya_ekleme(app, tmp_path):
+    dosya = tmp_path / 'kahve_feedback.csv'
+    dosya.write_bytes(
+        'timestamp,kahve_adi,kahveci,tercihler,alerjenler,beğeni_puanı,yorum\n'
+        '2024-03-20 10:30:00,Latte,Starbucks,"guclu,sicak","sut",4,"Çok lezzetliydi" '.encode('utf-8')
+    )
+    yazici = app.GeriBildirimYazici(str(dosya), yazma_araligi=0)
+    yazici.ekle(['2026-10-18 09:00:00', 'Mocha', 'Coffy', 'tatli', '', 5, ''])
+
+    with open(dosya, encoding='utf-8', newline='') as f:
+        satirlar = list(csv.reader(f))
+    assert len(satirlar) == 3
+    assert satirlar[1][-1] == 'Çok lezzetliydi '
+    assert satirlar[2][:2] == ['2026-10-18 09:00:00', 'Mocha']
+
+    ozet = app.GeriBildirimOzeti()
+    ozet.dosyadan_yukle(str(dosya))
+    assert ozet.istatistikler()['toplam_feedback'] == 2
+
+
+def test_cok_baytli_karakterle_biten_dosyaya_ekleme(app, tmp_path):
+    dosya = tmp_path / 'kahve_feedback.csv'
+    dosya.write_bytes(
+        'timestamp,kahve_adi,kahveci,tercihler,alerjenler,beğeni_puanı,yorum\n'
+        '2024-03-20 10:30:00,Latte,Starbucks,sicak,sut,4,Çok sıcaktı'.encode('utf-8')
+    )
+    yazici = app.GeriBildirimYazici(str(dosya), yazma_araligi=0)
+    yazici.ekle(['2026-10-18 09:00:00', 'Mocha', 'Coffy', 'tatli', '', 5, ''])
+
+    with open(dosya, encoding='utf-8', newline='') as f:
+        satirlar = list(csv.reader(f))
+    assert satirlar[1][-1] == 'Çok sıcaktı'
+    assert satirlar[2][1] == 'Mocha'
+
+
+def test_bos_dosyaya_baslik_yazilir(app, tmp_path):
+    dosya = tmp_path / 'kahve_feedback.csv'
+    yazici = app.GeriBildirimYazici(str(dosya), yazma_araligi=0)
+    yazici.ekle(['2026-10-18 09:00:00', 'Mocha', 'Coffy', 'tatli', '', 5, ''])
+    yazici.ekle(['2026-10-18 09:01:00', 'Latte', 'Coffy', 'sicak', 'sut', 4, ''])
+
+    with open(dosya, encoding='utf-8', newline='') as f:
+        satirlar = list(csv.reader(f))
+    assert satirlar[0] == app.GeriBildirimYazici.BASLIK
+    assert [satir[1] for satir in satirlar[1:]] == ['Mocha', 'Latte']